@@ -1,16 +1,17 @@
+import asyncio
+import functools
 import logging
-import time
-import schedule
-import pytz
-from datetime import datetime
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from src.news_fetcher import NewsFetcher
 from src.news_processor import NewsProcessor
 from src.summarizer import Summarizer
 from src.delivery import DeliveryManager
 from src.sentiment_analyzer import SentimentAnalyzer
 from src.stock_price_fetcher import StockPriceFetcher
-from src.export_manager import ExportManager
-import json
+from src import config_cache
 import os
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -26,20 +27,17 @@ def load_config(config_file='config/config.json'):
     Returns:
         Dictionary containing user configuration
     """
-    try:
-        with open(config_file, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading configuration: {e}")
-        return {}
+    return config_cache.load_config(config_file)
 
-def generate_news_summary(use_all_articles=False, export_format=None):
+def generate_news_summary(use_all_articles=False, export_format=None, delivery_manager=None):
     """
     Main function to generate and deliver the news summary.
     
     Args:
         use_all_articles: Whether to use all articles or only relevant ones
         export_format: Format to export the summary (None, 'markdown', 'pdf', or 'both')
+        delivery_manager: DeliveryManager kept across runs by the scheduler; a one-shot
+            manager is created and closed after delivery if not given
     """
     logger.info("Starting news summary generation")
     
@@ -47,10 +45,11 @@ def generate_news_summary(use_all_articles=False, export_format=None):
     news_fetcher = NewsFetcher()
     news_processor = NewsProcessor()
     summarizer = Summarizer()
-    delivery_manager = DeliveryManager()
+    owns_delivery_manager = delivery_manager is None
+    if owns_delivery_manager:
+        delivery_manager = DeliveryManager()
     sentiment_analyzer = SentimentAnalyzer()
     stock_price_fetcher = StockPriceFetcher()
-    export_manager = ExportManager()
     
     # Fetch news articles
     logger.info("Fetching news articles")
@@ -74,13 +73,14 @@ def generate_news_summary(use_all_articles=False, export_format=None):
         logger.warning("No relevant articles found after filtering")
         return
     
-    # Analyze sentiment
+    # Analyze sentiment and fetch stock prices concurrently, as they are independent
     logger.info("Analyzing sentiment of articles")
-    sentiment_results = sentiment_analyzer.analyze_sentiment(ranked_articles)
-    
-    # Fetch stock prices
     logger.info("Fetching current stock prices")
-    stock_prices = stock_price_fetcher.fetch_stock_prices()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sentiment_future = executor.submit(sentiment_analyzer.analyze_sentiment, ranked_articles)
+        stock_prices_future = executor.submit(stock_price_fetcher.fetch_stock_prices)
+        sentiment_results = sentiment_future.result()
+        stock_prices = stock_prices_future.result()
     
     # Generate summary
     logger.info("Generating summary")
@@ -98,12 +98,19 @@ def generate_news_summary(use_all_articles=False, export_format=None):
     
     # Export summary if requested
     if export_format:
+        # Only set up the exporter (and its export directory) when exporting
+        from src.export_manager import ExportManager
+        export_manager = ExportManager()
+        
+        # Render once and share the result between the export formats
+        rendered = export_manager.render(summary, title, additional_data)
+        
         if export_format in ['markdown', 'both']:
-            md_path = export_manager.export_to_markdown(summary, title, additional_data)
+            md_path = export_manager.write_markdown(rendered)
             logger.info(f"Exported summary to Markdown: {md_path}")
             
         if export_format in ['pdf', 'both']:
-            pdf_path = export_manager.export_to_pdf(summary, title, additional_data)
+            pdf_path = export_manager.write_pdf(rendered)
             if pdf_path:
                 logger.info(f"Exported summary to PDF: {pdf_path}")
             else:
@@ -111,17 +118,90 @@ def generate_news_summary(use_all_articles=False, export_format=None):
     
     # Deliver summary
     logger.info("Delivering summary")
-    success = delivery_manager.deliver_summary(summary, title)
+    try:
+        success = delivery_manager.deliver_summary(summary, title)
+    finally:
+        # Keep the pooled connections of a manager shared across scheduled runs
+        if owns_delivery_manager:
+            delivery_manager.close()
     
     if success:
         logger.info("Summary delivered successfully")
     else:
         logger.error("Failed to deliver summary")
 
+def _parse_schedule_time(schedule_time):
+    """
+    Parse the configured time of day of the daily summary.
+    
+    Args:
+        schedule_time: Time of day in HH:MM or HH:MM:SS format
+        
+    Returns:
+        Tuple of hour, minute and second
+        
+    Raises:
+        ValueError: If the time is not in HH:MM or HH:MM:SS format
+    """
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            parsed = datetime.strptime(str(schedule_time).strip(), fmt)
+            return parsed.hour, parsed.minute, parsed.second
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid schedule time {schedule_time!r}, expected HH:MM or HH:MM:SS")
+
+def _next_run_at(schedule_time, timezone):
+    """
+    Compute the next time the daily summary is due.
+    
+    Args:
+        schedule_time: Time of day in HH:MM or HH:MM:SS format
+        timezone: pytz timezone the schedule time is expressed in
+        
+    Returns:
+        Timezone-aware datetime of the next run
+    """
+    hour, minute, second = _parse_schedule_time(schedule_time)
+    now = datetime.now(timezone)
+    run_at = now.replace(tzinfo=None, hour=hour, minute=minute, second=second, microsecond=0)
+    if timezone.localize(run_at) <= now:
+        run_at += timedelta(days=1)
+    return timezone.localize(run_at)
+
+async def _run_daily(schedule_time, timezone):
+    """
+    Sleep until each scheduled time and generate the summary, forever.
+    
+    Args:
+        schedule_time: Time of day in HH:MM or HH:MM:SS format
+        timezone: pytz timezone the schedule time is expressed in
+    """
+    loop = asyncio.get_running_loop()
+    
+    # Share one delivery manager between runs, so its HTTP and SMTP connections are reused
+    delivery_manager = DeliveryManager()
+    try:
+        while True:
+            next_run = _next_run_at(schedule_time, timezone)
+            logger.info(f"Next summary scheduled for {next_run.strftime('%Y-%m-%d %H:%M %Z')}")
+            await asyncio.sleep(max(0.0, (next_run - datetime.now(timezone)).total_seconds()))
+            
+            # Note: scheduled jobs will always use filtered articles by default
+            try:
+                await loop.run_in_executor(None, functools.partial(generate_news_summary, delivery_manager=delivery_manager))
+            except Exception as e:
+                logger.error(f"Error generating scheduled summary: {e}")
+    finally:
+        delivery_manager.close()
+
 def schedule_daily_summary():
     """
     Schedule the daily news summary based on user configuration.
     """
+    # Scheduling dependencies are not needed for instant runs
+    import pytz
+    
     config = load_config()
     
     if not config or 'schedule' not in config:
@@ -135,17 +215,18 @@ def schedule_daily_summary():
     try:
         # Convert to the specified timezone
         timezone = pytz.timezone(timezone_str)
+        
+        # Reject a malformed schedule time at startup rather than in the scheduler loop
+        _parse_schedule_time(schedule_time)
         logger.info(f"Scheduling daily summary at {schedule_time} {timezone_str}")
         
-        # Schedule the job
-        # Note: scheduled jobs will always use filtered articles by default
-        schedule.every().day.at(schedule_time).do(generate_news_summary)
+        # Exit cleanly when the service manager stops us
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
         
-        # Keep the script running
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        asyncio.run(_run_daily(schedule_time, timezone))
             
+    except KeyboardInterrupt:
+        logger.info("Scheduler stopped")
     except Exception as e:
         logger.error(f"Error in scheduling: {e}")
 
@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Dict, Any
+
+class Article:
+    """
+    A news article fetched from an RSS feed.
+
+    Uses __slots__ as many articles are held in memory at once.
+    """
+    __slots__ = ('title', 'link', 'summary', 'published', 'published_parsed',
+                 'source', 'source_id', 'category', 'relevance_score')
+
+    def __init__(self, title: str, link: str, summary: str, published: str, published_parsed: datetime,
+                 source: str, source_id: str, category: str, relevance_score: int = 0):
+        """
+        Initialize the article.
+
+        Args:
+            title: Title of the article
+            link: URL of the article
+            summary: Summary or description of the article
+            published: Publication date as given by the feed
+            published_parsed: Parsed publication date, datetime.min if unknown
+            source: Name of the news source
+            source_id: Identifier of the news source
+            category: Category of the feed the article was found in
+            relevance_score: Relevance to the user's tickers and keywords
+        """
+        self.title = title
+        self.link = link
+        self.summary = summary
+        self.published = published
+        self.published_parsed = published_parsed
+        self.source = source
+        self.source_id = source_id
+        self.category = category
+        self.relevance_score = relevance_score
+
+    def __repr__(self) -> str:
+        return f"Article(title={self.title!r}, source={self.source!r}, link={self.link!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the article to a dictionary.
+
+        Returns:
+            Dictionary with the article's fields
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
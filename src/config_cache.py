@@ -0,0 +1,45 @@
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Dict, Any
+from src import json_utils
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=4)
+def _read_config(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    Read and parse a JSON configuration file.
+
+    The modification time is part of the cache key so edits to the file
+    invalidate the cached result.
+
+    Args:
+        path: Path to the configuration file
+        mtime_ns: Modification time of the file in nanoseconds
+
+    Returns:
+        Dictionary containing the parsed configuration
+    """
+    with open(path, 'rb') as f:
+        return json_utils.loads(f.read())
+
+def load_config(config_file: str) -> Dict[str, Any]:
+    """
+    Load a JSON configuration file, reusing the parsed result while the file is unchanged.
+
+    The returned dictionary is shared between callers and must not be modified.
+
+    Args:
+        config_file: Path to the configuration file
+
+    Returns:
+        Dictionary containing the configuration, or an empty dictionary on error
+    """
+    try:
+        return _read_config(config_file, os.stat(config_file).st_mtime_ns)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Error loading configuration: {e}")
+        return {}
@@ -1,15 +1,86 @@
-import json
+import hashlib
+import html
 import logging
+import os
+import random
 import time
-from typing import Dict, Any, Optional
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from string import Template
+from typing import Callable, Dict, Any, Iterator, Optional, Tuple
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from src import json_utils
+from src.config_cache import load_config
+from src.disk_cache import DiskCache
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Connect and read timeouts (in seconds) for webhook and push requests
+HTTP_TIMEOUT = (5, 30)
+
+# Longest Retry-After delay (in seconds) we are willing to wait before retrying
+MAX_RETRY_AFTER = 60
+
+# How long (in seconds) a delivered summary is remembered when idempotent delivery is enabled
+SENT_CACHE_TTL = 6 * 60 * 60
+
+# HTML scaffold for email delivery
+EMAIL_TEMPLATE = Template("""<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        h1 { color: #333366; }
+        .footer { font-size: 12px; color: #999; margin-top: 30px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>$title</h1>
+        $body
+        <div class="footer">
+            <p>This summary was generated automatically by Stock News Summarizer.</p>
+        </div>
+    </div>
+</body>
+</html>""")
+
+def _chunks(text: str, first_size: int, size: int) -> Iterator[str]:
+    """
+    Split text into a first chunk of first_size characters followed by chunks of size characters.
+    
+    Args:
+        text: The text to split
+        first_size: Length of the first chunk
+        size: Length of every following chunk
+        
+    Yields:
+        Consecutive slices of the text
+    """
+    yield text[:first_size]
+    for start in range(first_size, len(text), size):
+        yield text[start:start + size]
+
+def _retry_after(response: Any, default: float = 1.0, header: str = 'Retry-After') -> float:
+    """
+    Get the delay requested by a response's Retry-After header.
+    
+    Args:
+        response: The HTTP response
+        default: Delay to use if the header is missing or not a number of seconds
+        header: Name of the header holding the delay in seconds
+        
+    Returns:
+        Delay in seconds, capped at MAX_RETRY_AFTER
+    """
+    try:
+        delay = float(response.headers.get(header, default))
+    except ValueError:
+        delay = default
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
 class DeliveryManager:
     def __init__(self, config_file: str = 'config/config.json'):
         """
@@ -20,6 +91,159 @@ class DeliveryManager:
         """
         self.config_file = config_file
         self.config = self._load_config()
+        self._http2 = False
+        self._http_settings = self._get_http_settings()
+        self._http = self._create_http_session()
+        self._smtp = None
+        self._smtp_account = None
+        self._sent_cache_settings = self._get_sent_cache_settings()
+        self._sent_cache = self._create_sent_cache()
+        
+    def _create_http_session(self) -> Any:
+        """
+        Create a pooled HTTP client shared by all webhook-based delivery methods.
+        
+        Uses an HTTP/2 httpx client when delivery.http2 is enabled and the h2
+        package is installed, otherwise a requests session.
+        
+        Returns:
+            Configured HTTP client
+        """
+        if self.config.get('delivery', {}).get('http2', False):
+            try:
+                import httpx
+                transport = httpx.HTTPTransport(
+                    http2=True,
+                    retries=2,
+                    limits=httpx.Limits(max_connections=8, max_keepalive_connections=8)
+                )
+                client = httpx.Client(
+                    transport=transport,
+                    timeout=httpx.Timeout(HTTP_TIMEOUT[1], connect=HTTP_TIMEOUT[0])
+                )
+                self._http2 = True
+                return client
+            except ImportError as e:
+                logger.warning(f"HTTP/2 delivery not available ({e}), falling back to HTTP/1.1")
+        
+        # Imported here so importing this module doesn't load requests
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        session = requests.Session()
+        # Only retry failed connections: webhook POSTs are not idempotent, and rate limiting
+        # and unavailability responses are handled by _post_honoring_retry_after
+        retries = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.3)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def _post(self, url: str, **kwargs: Any) -> Any:
+        """
+        Send a POST request through the shared HTTP client.
+        
+        Args:
+            url: The URL to post to
+            **kwargs: Request arguments (data, json, headers)
+            
+        Returns:
+            The HTTP response
+        """
+        # Encode JSON payloads ourselves so the faster encoder is used when available
+        if 'json' in kwargs:
+            kwargs['data'] = json_utils.dumps(kwargs.pop('json'))
+            kwargs['headers'] = {**kwargs.get('headers', {}), 'Content-Type': 'application/json'}
+        
+        if not self._http2:
+            return self._http.post(url, timeout=HTTP_TIMEOUT, **kwargs)
+        
+        # httpx takes raw bodies as content and has its timeout set on the client
+        if isinstance(kwargs.get('data'), (str, bytes)):
+            kwargs['content'] = kwargs.pop('data')
+        return self._http.post(url, **kwargs)
+    
+    def _post_honoring_retry_after(self, url: str, **kwargs: Any) -> Any:
+        """
+        Send a POST request, retrying once after the requested delay if the server is rate limiting or unavailable.
+        
+        Args:
+            url: The URL to post to
+            **kwargs: Request arguments (data, json, headers)
+            
+        Returns:
+            The HTTP response
+        """
+        response = self._post(url, **kwargs)
+        
+        if response.status_code in (429, 503):
+            delay = _retry_after(response)
+            logger.warning(f"Server responded with {response.status_code}, retrying in {delay} seconds")
+            time.sleep(delay)
+            response = self._post(url, **kwargs)
+        
+        return response
+    
+    def _get_http_settings(self) -> Tuple[bool]:
+        """
+        Get the configuration values the shared HTTP client is built from.
+        
+        Returns:
+            Tuple of the settings
+        """
+        return (bool(self.config.get('delivery', {}).get('http2', False)),)
+    
+    def _get_sent_cache_settings(self) -> Tuple[bool, str]:
+        """
+        Get the configuration values the cache of delivered summaries is built from.
+        
+        Returns:
+            Tuple of the settings
+        """
+        return (bool(self.config.get('delivery', {}).get('idempotency', False)),
+                self.config.get('cache', {}).get('directory', 'cache'))
+    
+    def _reload_config(self) -> None:
+        """
+        Reload the configuration, rebuilding the HTTP client and the delivered summaries
+        cache if their settings changed, so a manager kept across scheduled runs follows config edits.
+        """
+        self.config = self._load_config()
+        
+        http_settings = self._get_http_settings()
+        if http_settings != self._http_settings:
+            logger.info("HTTP delivery settings changed, recreating the HTTP client")
+            self._http.close()
+            self._http2 = False
+            self._http = self._create_http_session()
+            self._http_settings = http_settings
+        
+        sent_cache_settings = self._get_sent_cache_settings()
+        if sent_cache_settings != self._sent_cache_settings:
+            logger.info("Idempotent delivery settings changed, reloading the delivered summaries cache")
+            self._sent_cache = self._create_sent_cache()
+            self._sent_cache_settings = sent_cache_settings
+    
+    def _create_sent_cache(self) -> Optional[DiskCache]:
+        """
+        Create the cache of already delivered summaries if idempotent delivery is enabled.
+        
+        Returns:
+            DiskCache instance or None if idempotent delivery is disabled
+        """
+        if not self.config.get('delivery', {}).get('idempotency', False):
+            return None
+        
+        cache_dir = self.config.get('cache', {}).get('directory', 'cache')
+        return DiskCache(os.path.join(cache_dir, 'delivery.json'))
+    
+    def close(self) -> None:
+        """
+        Release the pooled HTTP connections and the cached SMTP connection.
+        """
+        self._http.close()
+        self._close_smtp()
         
     def _load_config(self) -> Dict[str, Any]:
         """
@@ -28,12 +252,7 @@ class DeliveryManager:
         Returns:
             Dictionary containing user configuration
         """
-        try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading configuration: {e}")
-            return {}
+        return load_config(self.config_file)
     
     def deliver_summary(self, summary: str, title: str = "Stock News Summary") -> bool:
         """
@@ -46,34 +265,74 @@ class DeliveryManager:
         Returns:
             True if at least one delivery method succeeded, False otherwise
         """
+        # Pick up configuration changes when the manager is kept across scheduled runs
+        self._reload_config()
+        
         if not self.config or 'delivery' not in self.config:
             logger.error("Delivery configuration not found")
             return False
         
         delivery_config = self.config['delivery']
+        
+        # Collect the enabled delivery methods
+        channels = [
+            ('ntfy', self._deliver_via_ntfy),
+            ('email', self._deliver_via_email),
+            ('telegram', self._deliver_via_telegram),
+            ('discord', self._deliver_via_discord),
+            ('teams', self._deliver_via_teams),
+        ]
+        tasks = [(name, method) for name, method in channels
+                 if delivery_config.get(name, {}).get('enabled', False)]
+        
+        if not tasks:
+            logger.warning("No delivery methods enabled")
+            return False
+        
+        # Render the channel-specific bodies once, outside of any retry loops.
+        # Email needs an HTML document; the other channels take Markdown or plain text as is.
+        bodies = {name: summary for name, _ in tasks}
+        if 'email' in bodies:
+            bodies['email'] = self._render_email_html(summary, title)
+        
         success = False
         
-        # Try each enabled delivery method
-        if delivery_config.get('ntfy', {}).get('enabled', False):
-            if self._deliver_via_ntfy(summary, title):
-                success = True
+        # Deliver via all enabled methods concurrently, since each one is network-bound
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = {executor.submit(self._deliver_once, name, method, bodies[name], title): name for name, method in tasks}
+            for future in as_completed(futures):
+                try:
+                    if future.result():
+                        success = True
+                except Exception as e:
+                    logger.error(f"Error delivering via {futures[future]}: {e}")
         
-        if delivery_config.get('email', {}).get('enabled', False):
-            if self._deliver_via_email(summary, title):
-                success = True
+        return success
+    
+    def _deliver_once(self, channel: str, method: Callable[[str, str], bool], summary: str, title: str) -> bool:
+        """
+        Deliver the summary via a single method, skipping it if the same summary was already delivered.
         
-        if delivery_config.get('telegram', {}).get('enabled', False):
-            if self._deliver_via_telegram(summary, title):
-                success = True
+        Args:
+            channel: Name of the delivery method
+            method: The delivery method to call
+            summary: The summary body rendered for this delivery method
+            title: The title of the summary
+            
+        Returns:
+            True if delivery succeeded or was already done, False otherwise
+        """
+        if self._sent_cache is None:
+            return method(summary, title)
         
-        if delivery_config.get('discord', {}).get('enabled', False):
-            if self._deliver_via_discord(summary, title):
-                success = True
-                
-        if delivery_config.get('teams', {}).get('enabled', False):
-            if self._deliver_via_teams(summary, title):
-                success = True
+        key = hashlib.sha256(f"{channel}|{title}|{summary}".encode('utf-8')).hexdigest()
+        if self._sent_cache.get(key):
+            logger.info(f"Summary already delivered via {channel}, skipping")
+            return True
         
+        success = method(summary, title)
+        if success:
+            self._sent_cache.set(key, True, expire=SENT_CACHE_TTL)
         return success
     
     def _deliver_via_ntfy(self, summary: str, title: str) -> bool:
@@ -96,7 +355,7 @@ class DeliveryManager:
                 return False
             
             # Send notification to ntfy.sh
-            response = requests.post(
+            response = self._post_honoring_retry_after(
                 f"https://ntfy.sh/{topic}",
                 data=summary,
                 headers={
@@ -117,12 +376,28 @@ class DeliveryManager:
             logger.error(f"Error delivering via ntfy: {e}")
             return False
     
-    def _deliver_via_email(self, summary: str, title: str) -> bool:
+    def _render_email_html(self, summary: str, title: str) -> str:
+        """
+        Render the summary as an HTML email document.
+        
+        Args:
+            summary: The summary text
+            title: The title of the summary
+            
+        Returns:
+            HTML content
+        """
+        return EMAIL_TEMPLATE.substitute(
+            title=html.escape(title),
+            body=summary.replace('\n', '<br>')
+        )
+    
+    def _deliver_via_email(self, html_content: str, title: str) -> bool:
         """
         Deliver the summary via email.
         
         Args:
-            summary: The summary text to deliver
+            html_content: The summary rendered as an HTML document
             title: The title of the summary
             
         Returns:
@@ -143,26 +418,6 @@ class DeliveryManager:
             msg['To'] = recipient
             
             # Add summary as HTML content
-            html_content = f"""<html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; }}
-                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                    h1 {{ color: #333366; }}
-                    .footer {{ font-size: 12px; color: #999; margin-top: 30px; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <h1>{title}</h1>
-                    {summary.replace('\n', '<br>')}
-                    <div class="footer">
-                        <p>This summary was generated automatically by Stock News Summarizer.</p>
-                    </div>
-                </div>
-            </body>
-            </html>"""
-            
             msg.attach(MIMEText(html_content, 'html'))
             
             # Get email configuration
@@ -175,6 +430,9 @@ class DeliveryManager:
                 logger.error("Email password not configured in config.json")
                 return False
                 
+            # Serialize the message once so retries don't redo it
+            msg_bytes = msg.as_bytes()
+            
             # Send the email with improved error handling and logging
             max_retries = 2
             retry_count = 0
@@ -182,47 +440,15 @@ class DeliveryManager:
             
             while retry_count <= max_retries:
                 try:
-                    logger.info(f"Connecting to SMTP server {smtp_server}:{smtp_port} (Attempt {retry_count + 1}/{max_retries + 1})")
+                    logger.info(f"Sending email via {smtp_server}:{smtp_port} (Attempt {retry_count + 1}/{max_retries + 1})")
                     
-                    # Try to use SSL first if port is 465, otherwise use standard SMTP with STARTTLS
-                    if smtp_port == 465:
-                        logger.info("Using SMTP_SSL connection")
-                        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-                            server.set_debuglevel(2)
-                            
-                            logger.info("Identifying ourselves to the server (EHLO)")
-                            server.ehlo()
-                            
-                            logger.info(f"Attempting to log in as {sender_email}")
-                            server.login(sender_email, password)
-                            
-                            logger.info("Sending email message")
-                            server.send_message(msg)
-                            
-                            logger.info(f"Successfully sent email to {recipient}")
-                            return True
-                    else:
-                        logger.info("Using standard SMTP connection with STARTTLS")
-                        with smtplib.SMTP(smtp_server, smtp_port, timeout=timeout) as server:
-                            server.set_debuglevel(1)
-                            
-                            logger.info("Identifying ourselves to the server (EHLO)")
-                            server.ehlo()
-                            
-                            logger.info("Starting TLS encryption")
-                            server.starttls()
-                            
-                            logger.info("Re-identifying ourselves over TLS (EHLO)")
-                            server.ehlo()
-                            
-                            logger.info(f"Attempting to log in as {sender_email}")
-                            server.login(sender_email, password)
-                            
-                            logger.info("Sending email message")
-                            server.send_message(msg)
-                            
-                            logger.info(f"Successfully sent email to {recipient}")
-                            return True
+                    server = self._get_smtp(smtp_server, smtp_port, sender_email, password, timeout)
+                    
+                    logger.info("Sending email message")
+                    server.sendmail(sender_email, [recipient], msg_bytes)
+                    
+                    logger.info(f"Successfully sent email to {recipient}")
+                    return True
                             
                 except smtplib.SMTPAuthenticationError:
                     logger.error("Failed to authenticate with email server. If using Gmail, you need to use an App Password instead of your regular password.")
@@ -242,9 +468,12 @@ class DeliveryManager:
                     return False
                     
                 except (TimeoutError, smtplib.SMTPServerDisconnected, ConnectionRefusedError) as e:
+                    # Drop the broken connection so the next attempt reconnects
+                    self._close_smtp()
                     if retry_count < max_retries:
-                        wait_time = (retry_count + 1) * 3  # Progressive backoff: 3s, 6s
-                        logger.warning(f"Connection issue: {str(e)}. Retrying in {wait_time} seconds... (Attempt {retry_count + 1}/{max_retries})")
+                        # Exponential backoff with full jitter: up to 3s, then up to 6s
+                        wait_time = random.uniform(0, min(30, 3 * 2 ** retry_count))
+                        logger.warning(f"Connection issue: {str(e)}. Retrying in {wait_time:.1f} seconds... (Attempt {retry_count + 1}/{max_retries})")
                         time.sleep(wait_time)
                         retry_count += 1
                     else:
@@ -270,6 +499,81 @@ class DeliveryManager:
             logger.error(f"Error delivering via email: {e}")
             return False
     
+    def _get_smtp(self, smtp_server: str, smtp_port: int, sender_email: str, password: str, timeout: int) -> smtplib.SMTP:
+        """
+        Get an authenticated SMTP connection, reusing the previous one if it is still alive and for the same account.
+        
+        Args:
+            smtp_server: SMTP server hostname
+            smtp_port: SMTP server port
+            sender_email: Account used to log in
+            password: Password used to log in
+            timeout: Connection timeout in seconds
+            
+        Returns:
+            Authenticated SMTP connection
+        """
+        account = (smtp_server, smtp_port, sender_email, password)
+        if self._smtp is not None and self._smtp_account != account:
+            self._close_smtp()
+        
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    logger.info("Reusing existing SMTP connection")
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close_smtp()
+        
+        logger.info(f"Connecting to SMTP server {smtp_server}:{smtp_port}")
+        
+        # Try to use SSL first if port is 465, otherwise use standard SMTP with STARTTLS
+        if smtp_port == 465:
+            logger.info("Using SMTP_SSL connection")
+            server = smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=timeout)
+        else:
+            logger.info("Using standard SMTP connection with STARTTLS")
+            server = smtplib.SMTP(smtp_server, smtp_port, timeout=timeout)
+        
+        try:
+            # Protocol tracing prints every line, including the message body, to stderr
+            if logger.isEnabledFor(logging.DEBUG):
+                server.set_debuglevel(1)
+            
+            logger.info("Identifying ourselves to the server (EHLO)")
+            server.ehlo()
+            
+            if smtp_port != 465:
+                logger.info("Starting TLS encryption")
+                server.starttls()
+                
+                logger.info("Re-identifying ourselves over TLS (EHLO)")
+                server.ehlo()
+            
+            logger.info(f"Attempting to log in as {sender_email}")
+            server.login(sender_email, password)
+        except Exception:
+            server.close()
+            raise
+        
+        self._smtp = server
+        self._smtp_account = account
+        return server
+    
+    def _close_smtp(self) -> None:
+        """
+        Close the cached SMTP connection, if any.
+        """
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+        self._smtp_account = None
+    
     def _deliver_via_telegram(self, summary: str, title: str) -> bool:
         """
         Deliver the summary via Telegram bot.
@@ -294,7 +598,7 @@ class DeliveryManager:
             message = f"*{title}*\n\n{summary}"
             
             # Send message via Telegram Bot API
-            response = requests.post(
+            response = self._post_honoring_retry_after(
                 f"https://api.telegram.org/bot{bot_token}/sendMessage",
                 json={
                     "chat_id": chat_id,
@@ -338,52 +642,21 @@ class DeliveryManager:
             first_message = f"**{title}**\n\n"
             max_content_length = 2000 - len(first_message)
             
-            if len(summary) <= max_content_length:
-                # Summary fits in a single message
-                response = requests.post(
-                    webhook_url,
-                    json={
-                        "content": first_message + summary
-                    }
-                )
+            # Send the summary in chunks of at most 2000 characters, the first one with the title
+            chunk_size = 1950  # Slightly less than 2000 to be safe
+            
+            response = None
+            for i, chunk in enumerate(_chunks(summary, max_content_length, chunk_size)):
+                # Wait for the rate limit bucket to reset before the next part, only if it has no remaining capacity
+                if response is not None and response.headers.get('X-RateLimit-Remaining') == '0':
+                    time.sleep(_retry_after(response, header='X-RateLimit-Reset-After'))
                 
-                if response.status_code != 204:
-                    logger.error(f"Failed to deliver via Discord: {response.status_code} {response.text}")
-                    return False
-            else:
-                # Need to split the summary into multiple messages
-                # Send the first message with the title
-                first_part = summary[:max_content_length]
-                response = requests.post(
-                    webhook_url,
-                    json={
-                        "content": first_message + first_part
-                    }
-                )
+                content = ''.join((first_message, chunk)) if i == 0 else chunk
+                response = self._post_to_discord(webhook_url, content)
                 
                 if response.status_code != 204:
-                    logger.error(f"Failed to deliver first part via Discord: {response.status_code} {response.text}")
+                    logger.error(f"Failed to deliver part {i + 1} via Discord: {response.status_code} {response.text}")
                     return False
-                
-                # Send remaining parts in chunks of 2000 characters
-                remaining = summary[max_content_length:]
-                chunk_size = 1950  # Slightly less than 2000 to be safe
-                
-                for i in range(0, len(remaining), chunk_size):
-                    chunk = remaining[i:i+chunk_size]
-                    response = requests.post(
-                        webhook_url,
-                        json={
-                            "content": chunk
-                        }
-                    )
-                    
-                    if response.status_code != 204:
-                        logger.error(f"Failed to deliver part {i//chunk_size + 2} via Discord: {response.status_code} {response.text}")
-                        return False
-                    
-                    # Add a small delay between messages to avoid rate limiting
-                    time.sleep(0.5)
             
             logger.info("Successfully delivered summary via Discord")
             return True
@@ -392,6 +665,39 @@ class DeliveryManager:
             logger.error(f"Error delivering via Discord: {e}")
             return False
     
+    def _post_to_discord(self, webhook_url: str, content: str, max_attempts: int = 3) -> Any:
+        """
+        Post a single message to a Discord webhook, honoring Discord's rate limit headers.
+        
+        Retries after the requested delay when the request was rate limited; waiting for an
+        exhausted rate limit bucket is left to the caller, as it only matters before another message.
+        
+        Args:
+            webhook_url: The Discord webhook URL
+            content: The message content
+            max_attempts: Maximum number of attempts when rate limited
+            
+        Returns:
+            The final response from Discord
+        """
+        for attempt in range(max_attempts):
+            response = self._post(
+                webhook_url,
+                json={
+                    "content": content
+                }
+            )
+            
+            if response.status_code == 429 and attempt < max_attempts - 1:
+                retry_after = _retry_after(response)
+                logger.warning(f"Discord rate limit hit, retrying in {retry_after} seconds")
+                time.sleep(retry_after)
+                continue
+            
+            return response
+        
+        return response
+    
     def _deliver_via_teams(self, summary: str, title: str) -> bool:
         """
         Deliver the summary via Microsoft Teams webhook.
@@ -423,7 +729,7 @@ class DeliveryManager:
                     "text": summary
                 }
                 
-                response = requests.post(
+                response = self._post(
                     webhook_url,
                     json=payload
                 )
@@ -437,17 +743,19 @@ class DeliveryManager:
             else:
                 # Split the summary into multiple messages
                 chunks = []
-                current_chunk = ""
+                current_lines = []
+                current_length = 0
                 
                 for line in summary.split('\n'):
-                    if len(current_chunk) + len(line) + 1 <= max_content_length:
-                        current_chunk += line + '\n'
-                    else:
-                        chunks.append(current_chunk)
-                        current_chunk = line + '\n'
+                    if current_lines and current_length + len(line) + 1 > max_content_length:
+                        chunks.append('\n'.join(current_lines) + '\n')
+                        current_lines = []
+                        current_length = 0
+                    current_lines.append(line)
+                    current_length += len(line) + 1
                 
-                if current_chunk:
-                    chunks.append(current_chunk)
+                if current_lines:
+                    chunks.append('\n'.join(current_lines) + '\n')
                 
                 # Send the first message with the title
                 first_payload = {
@@ -455,7 +763,7 @@ class DeliveryManager:
                     "text": chunks[0]
                 }
                 
-                response = requests.post(
+                response = self._post(
                     webhook_url,
                     json=first_payload
                 )
@@ -471,7 +779,7 @@ class DeliveryManager:
                         "text": chunk
                     }
                     
-                    response = requests.post(
+                    response = self._post(
                         webhook_url,
                         json=continuation_payload
                     )
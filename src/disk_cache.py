@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    def __init__(self, path: str):
+        """
+        Initialize a small persistent key-value cache stored as a JSON file.
+
+        Args:
+            path: Path to the cache file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._dirty = set()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the cache entries from disk, dropping expired ones.
+
+        Returns:
+            Dictionary of cache entries
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable cache file {self.path}: {e}")
+            return {}
+
+        now = time.time()
+        return {key: entry for key, entry in entries.items()
+                if entry.get('expires') is None or entry['expires'] > now}
+
+    def _save(self) -> None:
+        """
+        Write the cache entries to disk atomically.
+
+        The entries set through this instance are merged into the current file contents,
+        so other instances and processes sharing the file don't lose their entries.
+        """
+        entries = self._load()
+        entries.update((key, self._entries[key]) for key in self._dirty)
+        self._entries = entries
+        self._dirty.clear()
+
+        tmp_path = None
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Use a unique temporary file, so concurrent writers can't clobber each other's
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory or '.',
+                                             prefix=os.path.basename(self.path), suffix='.tmp',
+                                             delete=False) as f:
+                tmp_path = f.name
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error writing cache file {self.path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a cached value.
+
+        Args:
+            key: The cache key
+            default: Value to return if the key is missing or expired
+
+        Returns:
+            The cached value or the default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry.get('expires') is not None and entry['expires'] <= time.time():
+                del self._entries[key]
+                return default
+            return entry['value']
+
+    def set(self, key: str, value: Any, expire: Optional[float] = None) -> None:
+        """
+        Store a JSON-serializable value and persist the cache.
+
+        Args:
+            key: The cache key
+            value: The value to store
+            expire: Time to live in seconds, or None to keep the value indefinitely
+        """
+        entry = {'value': value, 'expires': time.time() + expire if expire else None}
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty.add(key)
+            self._save()
+
+    def set_many(self, values: Dict[str, Any], expire: Optional[float] = None) -> None:
+        """
+        Store several JSON-serializable values and persist the cache once.
+
+        Args:
+            values: Mapping of cache keys to the values to store
+            expire: Time to live in seconds, or None to keep the values indefinitely
+        """
+        expires = time.time() + expire if expire else None
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = {'value': value, 'expires': expires}
+            self._dirty.update(values)
+            self._save()
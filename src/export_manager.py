@@ -1,12 +1,196 @@
+import hashlib
+import html
 import logging
-import json
-from typing import Dict, List, Any, Optional
+from typing import BinaryIO, Callable, Dict, List, Any, Optional, Tuple
 import os
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
+from string import Template
+from src.config_cache import load_config
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Output buffer size for export files
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Markdown is used to convert the summary text for PDF export; fall back to plain text without it
+try:
+    import markdown
+except ImportError:
+    markdown = None
+
+# Layouts of the exported documents, compiled once
+MARKDOWN_TEMPLATE = Template("""# $title
+
+$price_table$sentiment_table## Summary
+
+$body""")
+
+PRICE_TABLE_TEMPLATE = Template("""## Current Stock Prices
+
+| Ticker | Price | Change | % Change |
+|--------|-------|--------|---------|
+$rows
+""")
+
+SENTIMENT_SECTION_TEMPLATE = Template("""## Market Sentiment
+
+$sections""")
+
+HTML_PRICE_TABLE_TEMPLATE = Template("""<h2>Current Stock Prices</h2>
+<table>
+<thead>
+<tr><th>Ticker</th><th>Price</th><th>Change</th><th>% Change</th></tr>
+</thead>
+<tbody>
+$rows</tbody>
+</table>
+""")
+
+HTML_SENTIMENT_SECTION_TEMPLATE = Template("""<h2>Market Sentiment</h2>
+$sections""")
+
+PDF_HTML_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>$title</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; }
+        h1 { color: #333366; }
+        h2 { color: #333366; margin-top: 20px; }
+        table { border-collapse: collapse; width: 100%; margin: 20px 0; }
+        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+        th { background-color: #f2f2f2; }
+    </style>
+</head>
+<body>
+<h1>$title</h1>
+$price_table$sentiment_table<h2>Summary</h2>
+$body
+</body>
+</html>""")
+
+@lru_cache(maxsize=None)
+def _load_weasyprint() -> Optional[Tuple[Any, Any]]:
+    """
+    Load weasyprint and its font configuration on the first PDF export, once per process.
+    
+    PDF rendering is optional, and importing weasyprint fails with OSError rather than
+    ImportError when its system libraries (pango, gobject) are missing.
+    
+    Returns:
+        The weasyprint HTML class and font configuration, or None if weasyprint is not usable
+    """
+    try:
+        from weasyprint import HTML
+        from weasyprint.text.fonts import FontConfiguration
+        return HTML, FontConfiguration()
+    except Exception as e:
+        logger.error(f"Required libraries for PDF export not available: weasyprint ({e})")
+        return None
+
+def _format_quote_value(value: Any, spec: str = '.2f') -> str:
+    """
+    Format a numeric stock quote field for display.
+    
+    Args:
+        value: The field value
+        spec: Format spec used for numbers
+        
+    Returns:
+        The formatted value, 'N/A' if it is missing
+    """
+    if isinstance(value, (int, float)):
+        return format(value, spec)
+    return 'N/A' if value is None else str(value)
+
+@dataclass
+class RenderedSummary:
+    """
+    Summary content prepared once and shared by all export formats.
+    
+    Stock prices are (ticker, price, change, percent change) rows formatted for display,
+    sentiment rows are (ticker, positive, negative, neutral) mention counts. Either is None
+    when the data is not available.
+    """
+    title: str
+    body: str
+    prices: Optional[List[Tuple[str, str, str, str]]] = None
+    sentiment: Optional[List[Tuple[str, int, int, int]]] = None
+    date_str: str = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d"))
+    
+    def to_markdown(self) -> str:
+        """
+        Assemble the full Markdown document.
+        
+        Returns:
+            Markdown content
+        """
+        price_table = ""
+        if self.prices is not None:
+            rows = ''.join(f"| {ticker} | ${price} | {change} | {percent_change}% |\n"
+                           for ticker, price, change, percent_change in self.prices)
+            price_table = PRICE_TABLE_TEMPLATE.substitute(rows=rows)
+        
+        sentiment_table = ""
+        if self.sentiment is not None:
+            sections = ''.join(f"### {ticker}\n\n"
+                               f"- Positive mentions: {positive}\n"
+                               f"- Negative mentions: {negative}\n"
+                               f"- Neutral mentions: {neutral}\n\n"
+                               for ticker, positive, negative, neutral in self.sentiment)
+            sentiment_table = SENTIMENT_SECTION_TEMPLATE.substitute(sections=sections)
+        
+        return MARKDOWN_TEMPLATE.substitute(
+            title=self.title,
+            price_table=price_table,
+            sentiment_table=sentiment_table,
+            body=self.body
+        )
+    
+    def to_html(self) -> str:
+        """
+        Assemble the full HTML document used for PDF export.
+        
+        The tables are generated as HTML directly; only the summary text is converted from Markdown.
+        
+        Returns:
+            HTML content
+        """
+        escape = html.escape
+        
+        price_table = ""
+        if self.prices is not None:
+            rows = ''.join(f"<tr><td>{escape(ticker)}</td><td>${escape(price)}</td>"
+                           f"<td>{escape(change)}</td><td>{escape(percent_change)}%</td></tr>\n"
+                           for ticker, price, change, percent_change in self.prices)
+            price_table = HTML_PRICE_TABLE_TEMPLATE.substitute(rows=rows)
+        
+        sentiment_table = ""
+        if self.sentiment is not None:
+            sections = ''.join(f"<h3>{escape(ticker)}</h3>\n<ul>\n"
+                               f"<li>Positive mentions: {positive}</li>\n"
+                               f"<li>Negative mentions: {negative}</li>\n"
+                               f"<li>Neutral mentions: {neutral}</li>\n</ul>\n"
+                               for ticker, positive, negative, neutral in self.sentiment)
+            sentiment_table = HTML_SENTIMENT_SECTION_TEMPLATE.substitute(sections=sections)
+        
+        if markdown is not None:
+            body = markdown.markdown(self.body, extensions=['tables'])
+        else:
+            logger.warning("Markdown library not available, using basic HTML conversion")
+            body = escape(self.body).replace('\n', '<br>')
+        
+        return PDF_HTML_TEMPLATE.substitute(
+            title=escape(self.title),
+            price_table=price_table,
+            sentiment_table=sentiment_table,
+            body=body
+        )
+
 class ExportManager:
     def __init__(self, config_file: str = 'config/config.json'):
         """
@@ -26,12 +210,7 @@ class ExportManager:
         Returns:
             Dictionary containing user configuration
         """
-        try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading configuration: {e}")
-            return {}
+        return load_config(self.config_file)
     
     def _ensure_export_directory(self) -> str:
         """
@@ -54,9 +233,9 @@ class ExportManager:
                     
         return export_dir
     
-    def export_to_markdown(self, summary: str, title: str, additional_data: Dict[str, Any] = None) -> str:
+    def render(self, summary: str, title: str, additional_data: Dict[str, Any] = None) -> RenderedSummary:
         """
-        Export the summary to a Markdown file.
+        Prepare the summary and its additional data once for all export formats.
         
         Args:
             summary: The summary text
@@ -64,61 +243,72 @@ class ExportManager:
             additional_data: Additional data to include in the export (e.g., sentiment, stock prices)
             
         Returns:
-            Path to the exported file
+            Rendered summary
         """
+        prices = None
+        sentiment = None
+        
         try:
-            # Generate filename with date
-            date_str = datetime.now().strftime("%Y-%m-%d")
-            filename = f"stock_summary_{date_str}.md"
-            file_path = os.path.join(self.export_dir, filename)
-            
-            # Create markdown content
-            md_content = f"# {title}\n\n"
-            
             # Add stock prices if available
             if additional_data and 'stock_prices' in additional_data and additional_data['stock_prices']:
-                md_content += "## Current Stock Prices\n\n"
-                md_content += "| Ticker | Price | Change | % Change |\n"
-                md_content += "|--------|-------|--------|---------|\n"
-                
+                prices = []
+                append = prices.append
+            
                 for ticker, data in additional_data['stock_prices'].items():
-                    price = data.get('price', 'N/A')
-                    change = data.get('change', 'N/A')
-                    percent_change = data.get('percent_change', 'N/A')
-                    
-                    # Format change with color indicators (+ or -)
-                    if change != 'N/A' and float(change) > 0:
-                        change_str = f"+{change}"
-                    else:
-                        change_str = f"{change}"
-                        
-                    md_content += f"| {ticker} | ${price} | {change_str} | {percent_change}% |\n"
+                    get = data.get
+                    change = get('change')
                 
-                md_content += "\n"
-            
+                    # Format change with color indicators (+ or -)
+                    change_spec = '+.2f' if isinstance(change, (int, float)) and change > 0 else '.2f'
+                    
+                    append((str(ticker), _format_quote_value(get('price')), _format_quote_value(change, change_spec),
+                            _format_quote_value(get('percent_change'))))
+        
             # Add sentiment analysis if available
             if additional_data and 'sentiment' in additional_data and additional_data['sentiment']:
-                md_content += "## Market Sentiment\n\n"
-                
+                sentiment = []
+                append = sentiment.append
+            
                 for ticker, sentiment_data in additional_data['sentiment'].items():
-                    positive = sentiment_data.get('positive', 0)
-                    negative = sentiment_data.get('negative', 0)
-                    neutral = sentiment_data.get('neutral', 0)
+                    get = sentiment_data.get
+                    positive = get('positive', 0)
+                    negative = get('negative', 0)
+                    neutral = get('neutral', 0)
                     total = positive + negative + neutral
-                    
+                
                     if total > 0:
-                        md_content += f"### {ticker}\n\n"
-                        md_content += f"- Positive mentions: {positive}\n"
-                        md_content += f"- Negative mentions: {negative}\n"
-                        md_content += f"- Neutral mentions: {neutral}\n\n"
+                        append((str(ticker), positive, negative, neutral))
+        except Exception as e:
+            logger.error(f"Error rendering export data: {e}")
+        
+        return RenderedSummary(title=title, body=summary, prices=prices, sentiment=sentiment)
+    
+    def write_markdown(self, rendered: RenderedSummary) -> str:
+        """
+        Write a rendered summary to a Markdown file.
+        
+        Args:
+            rendered: The rendered summary
+            
+        Returns:
+            Path to the exported file
+        """
+        try:
+            # Generate filename with the date the summary was rendered on
+            filename = f"stock_summary_{rendered.date_str}.md"
+            file_path = os.path.join(self.export_dir, filename)
+            
+            md_content = rendered.to_markdown().encode('utf-8')
             
-            # Add the main summary
-            md_content += "## Summary\n\n"
-            md_content += summary
+            # Skip writing if the file already has the same content
+            content_hash = hashlib.blake2b(md_content, digest_size=16).hexdigest()
+            if self._is_up_to_date(file_path, content_hash):
+                logger.info(f"Markdown export is up to date: {file_path}")
+                return file_path
             
             # Write to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(md_content)
+            self._write_atomic(file_path, lambda f: f.write(md_content))
+            self._write_atomic(file_path + '.hash', lambda f: f.write(content_hash.encode('ascii')))
                 
             return file_path
                 
@@ -126,78 +316,112 @@ class ExportManager:
             logger.error(f"Error exporting to Markdown: {e}")
             return ""
     
-    def export_to_pdf(self, summary: str, title: str, additional_data: Dict[str, Any] = None) -> str:
+    def write_pdf(self, rendered: RenderedSummary) -> str:
         """
-        Export the summary to a PDF file.
+        Write a rendered summary to a PDF file.
         
         Args:
-            summary: The summary text
-            title: The title of the summary
-            additional_data: Additional data to include in the export (e.g., sentiment, stock prices)
+            rendered: The rendered summary
             
         Returns:
             Path to the exported file
         """
         try:
-            # First export to Markdown
-            md_path = self.export_to_markdown(summary, title, additional_data)
-            if not md_path:
-                return ""
-                
-            # Generate PDF filename
-            date_str = datetime.now().strftime("%Y-%m-%d")
-            filename = f"stock_summary_{date_str}.pdf"
+            # Generate PDF filename, matching the Markdown file of the same summary
+            filename = f"stock_summary_{rendered.date_str}.pdf"
             pdf_path = os.path.join(self.export_dir, filename)
             
-            try:
-                # Try to import the required libraries for PDF conversion
-                from weasyprint import HTML
-                
-                # Read the markdown content
-                with open(md_path, 'r', encoding='utf-8') as f:
-                    md_content = f.read()
-                
-                # Convert markdown to HTML
-                try:
-                    import markdown
-                    html_content = markdown.markdown(md_content, extensions=['tables'])
-                except ImportError:
-                    logger.warning("Markdown library not available, using basic HTML conversion")
-                    # Basic conversion of markdown to HTML
-                    html_content = f"<h1>{title}</h1>\n" + md_content.replace('\n', '<br>')
-                
-                # Add some basic styling
-                styled_html = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <title>{title}</title>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                        h1 {{ color: #333366; }}
-                        h2 {{ color: #333366; margin-top: 20px; }}
-                        table {{ border-collapse: collapse; width: 100%; margin: 20px 0; }}
-                        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                        th {{ background-color: #f2f2f2; }}
-                    </style>
-                </head>
-                <body>
-                    {html_content}
-                </body>
-                </html>
-                """
-                
-                # Generate PDF
-                HTML(string=styled_html).write_pdf(pdf_path)
-                logger.info(f"Successfully exported to PDF: {pdf_path}")
+            # Skip rendering if the PDF was already generated from the same content
+            content_hash = hashlib.blake2b(rendered.to_markdown().encode('utf-8'), digest_size=16).hexdigest()
+            if self._is_up_to_date(pdf_path, content_hash):
+                logger.info(f"PDF is up to date: {pdf_path}")
                 return pdf_path
-                
-            except ImportError as e:
-                logger.error(f"Required libraries for PDF export not available: {e}")
+            
+            weasyprint = _load_weasyprint()
+            if weasyprint is None:
                 logger.info("Please install weasyprint and markdown libraries for PDF export")
                 return ""
+            HTML, font_config = weasyprint
+            
+            styled_html = rendered.to_html()
+            
+            # Generate PDF, reusing the font configuration between exports
+            document = HTML(string=styled_html)
+            self._write_atomic(pdf_path, lambda f: document.write_pdf(f, font_config=font_config))
+            self._write_atomic(pdf_path + '.hash', lambda f: f.write(content_hash.encode('ascii')))
+            
+            logger.info(f"Successfully exported to PDF: {pdf_path}")
+            return pdf_path
                 
         except Exception as e:
             logger.error(f"Error exporting to PDF: {e}")
-            return ""
\ No newline at end of file
+            return ""
+    
+    def _is_up_to_date(self, file_path: str, content_hash: str) -> bool:
+        """
+        Check whether an exported file was written from content with the given hash.
+        
+        The hash of the content is stored in a sidecar file next to each export.
+        
+        Args:
+            file_path: Path to the exported file
+            content_hash: Hash of the content that would be exported
+            
+        Returns:
+            True if the file exists and matches the content
+        """
+        if not os.path.exists(file_path):
+            return False
+        
+        try:
+            with open(file_path + '.hash', 'r', encoding='ascii') as f:
+                return f.read().strip() == content_hash
+        except (OSError, ValueError):
+            return False
+    
+    def _write_atomic(self, file_path: str, write: Callable[[BinaryIO], Any]) -> None:
+        """
+        Write a file through a temporary file and rename it into place,
+        so readers never see a partially written file.
+        
+        Args:
+            file_path: Path to the file to write
+            write: Function writing the content to the open binary file
+        """
+        tmp_path = file_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                write(f)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def export_to_markdown(self, summary: str, title: str, additional_data: Dict[str, Any] = None) -> str:
+        """
+        Export the summary to a Markdown file.
+        
+        Args:
+            summary: The summary text
+            title: The title of the summary
+            additional_data: Additional data to include in the export (e.g., sentiment, stock prices)
+            
+        Returns:
+            Path to the exported file
+        """
+        return self.write_markdown(self.render(summary, title, additional_data))
+    
+    def export_to_pdf(self, summary: str, title: str, additional_data: Dict[str, Any] = None) -> str:
+        """
+        Export the summary to a PDF file.
+        
+        Args:
+            summary: The summary text
+            title: The title of the summary
+            additional_data: Additional data to include in the export (e.g., sentiment, stock prices)
+            
+        Returns:
+            Path to the exported file
+        """
+        return self.write_pdf(self.render(summary, title, additional_data))
\ No newline at end of file
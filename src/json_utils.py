@@ -0,0 +1,37 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse JSON, using orjson when it is installed.
+
+    Raises json.JSONDecodeError on invalid input with either backend.
+
+    Args:
+        data: JSON document as bytes or text
+
+    Returns:
+        The parsed value
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(value: Any) -> bytes:
+    """
+    Serialize a value to UTF-8 encoded JSON, using orjson when it is installed.
+
+    Args:
+        value: The value to serialize
+
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value).encode('utf-8')
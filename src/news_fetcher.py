@@ -1,13 +1,167 @@
-import json
+import email.utils
+import hashlib
+import html
+import io
 import logging
-import feedparser
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
-import time
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from operator import attrgetter
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+from src.article import Article
+from src.config_cache import load_config
+from src.disk_cache import DiskCache
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Maximum number of hosts fetched from in parallel
+MAX_FEED_WORKERS = 8
+
+# Timeout (in seconds) for downloading a single feed
+FEED_TIMEOUT = 10
+
+# Maximum total size of the parsed feed cache, in bytes
+PARSE_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+# Version of the parsed feed cache entries, changed whenever parsing changes
+PARSE_CACHE_VERSION = b'feed-parse-2'
+
+# Namespaces of the RSS and Atom versions read by the XML feed parser
+RSS_NAMESPACES = ('', 'http://purl.org/rss/1.0/', 'http://my.netscape.com/rdf/simple/0.9/')
+ATOM_NAMESPACES = ('http://www.w3.org/2005/Atom', 'http://purl.org/atom/ns#')
+DC_NAMESPACE = 'http://purl.org/dc/elements/1.1/'
+
+def _tag(namespace: str, name: str) -> str:
+    """
+    Get the ElementTree tag of an element name in a namespace.
+    
+    Args:
+        namespace: The namespace URI, '' for none
+        name: The element name
+        
+    Returns:
+        The namespace-qualified tag
+    """
+    return f"{{{namespace}}}{name}" if namespace else name
+
+# Tags of RSS items and Atom entries, and of their links
+FEED_ITEM_TAGS = frozenset([_tag(ns, 'item') for ns in RSS_NAMESPACES] + [_tag(ns, 'entry') for ns in ATOM_NAMESPACES])
+RSS_LINK_TAGS = frozenset(_tag(ns, 'link') for ns in RSS_NAMESPACES)
+ATOM_LINK_TAGS = frozenset(_tag(ns, 'link') for ns in ATOM_NAMESPACES)
+
+# Tags of the item fields used for articles, mapped to field names
+FEED_FIELD_TAGS = {
+    _tag(ns, name): field
+    for namespaces, fields in (
+        (RSS_NAMESPACES, {'title': 'title', 'description': 'description', 'pubDate': 'pubDate'}),
+        (ATOM_NAMESPACES, {'title': 'title', 'summary': 'summary', 'content': 'content', 'published': 'published',
+                           'updated': 'updated', 'issued': 'published', 'modified': 'updated'}),
+        ((DC_NAMESPACE,), {'date': 'date'}),
+    )
+    for ns in namespaces
+    for name, field in fields.items()
+}
+
+# Date formats tried when neither the ISO 8601 nor the RFC 822 parser accepts a date
+FALLBACK_DATE_FORMATS = [
+    '%a, %d %b %Y %H:%M:%S %z',  # RFC 822
+    '%a, %d %b %Y %H:%M:%S %Z',  # RFC 822 with timezone name
+    '%Y-%m-%dT%H:%M:%S%z',       # ISO 8601
+    '%Y-%m-%dT%H:%M:%S.%f%z',    # ISO 8601 with fractional seconds
+    '%Y-%m-%dT%H:%M:%SZ',        # ISO 8601 UTC
+    '%Y-%m-%d %H:%M:%S',         # Simple format
+    '%a %b %d %H:%M:%S %Y',      # Another common format
+]
+
+@lru_cache(maxsize=4096)
+def parse_feed_date(date_str: str) -> Optional[datetime]:
+    """
+    Parse a feed date string into a timezone-naive UTC datetime.
+    
+    Dates starting with a digit are tried as ISO 8601 (Atom) first, all others
+    as RFC 822 (RSS) first, so each date normally takes a single parse attempt;
+    the other parser and then the fallback formats are tried if that fails.
+    Feeds repeat the same dates across runs, so results are cached.
+    
+    Args:
+        date_str: Date string from RSS feed
+        
+    Returns:
+        Datetime object or None if parsing fails
+    """
+    if not date_str:
+        return None
+    
+    date_str = date_str.strip()
+    parsers = (_parse_iso_date, email.utils.parsedate_to_datetime)
+    if not date_str[:1].isdigit():
+        parsers = parsers[::-1]
+    
+    dt = None
+    for parser in parsers:
+        try:
+            dt = parser(date_str)
+            break
+        except (TypeError, ValueError, IndexError):
+            continue
+    else:
+        # Try the less common date formats
+        for fmt in FALLBACK_DATE_FORMATS:
+            try:
+                dt = datetime.strptime(date_str, fmt)
+                break
+            except ValueError:
+                continue
+    
+    if dt is None:
+        logger.warning(f"Could not parse date: {date_str}")
+        return None
+    
+    # Ensure timezone-naive UTC datetime for consistent comparison
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def _parse_iso_date(date_str: str) -> datetime:
+    """
+    Parse an ISO 8601 date string.
+    
+    Args:
+        date_str: Date string from an Atom feed
+        
+    Returns:
+        Datetime object
+        
+    Raises:
+        ValueError: If the date is not in ISO 8601 format
+    """
+    return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+
+def _element_text(element: ElementTree.Element) -> str:
+    """
+    Get the plain text of a feed element, decoding Atom html and xhtml text constructs.
+    
+    Args:
+        element: The feed element
+        
+    Returns:
+        The element's text, stripped
+    """
+    text_type = element.get('type', 'text')
+    if text_type == 'xhtml' or text_type.endswith('xhtml+xml'):
+        # The text is markup inside a <div> child
+        return ''.join(element.itertext()).strip()
+    if text_type == 'html':
+        # The text is escaped HTML, so entities are escaped twice in the document
+        return html.unescape(element.text or '').strip()
+    return (element.text or '').strip()
+
 class NewsFetcher:
     def __init__(self, sources_file: str = 'config/sources.json', config_file: str = 'config/config.json'):
         """
@@ -21,6 +175,28 @@ class NewsFetcher:
         self.config_file = config_file
         self.sources = self._load_sources()
         self.config = self._load_config()
+        self._http = self._create_http_session()
+        self._cache_dir = self.config.get('cache', {}).get('directory', 'cache')
+        self._feed_state = DiskCache(os.path.join(self._cache_dir, 'feed_state.json'))
+        
+    def _create_http_session(self) -> Any:
+        """
+        Create a pooled HTTP session for downloading feeds.
+        
+        Returns:
+            Configured requests session
+        """
+        # Imported here so importing this module doesn't load requests and feedparser
+        import feedparser
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        session.headers['User-Agent'] = feedparser.USER_AGENT
+        adapter = HTTPAdapter(pool_connections=MAX_FEED_WORKERS, pool_maxsize=MAX_FEED_WORKERS)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
         
     def _load_sources(self) -> Dict[str, Any]:
         """
@@ -29,12 +205,7 @@ class NewsFetcher:
         Returns:
             Dictionary containing news sources configuration
         """
-        try:
-            with open(self.sources_file, 'r') as f:
-                return json.load(f).get('sources', {})
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading sources: {e}")
-            return {}
+        return load_config(self.sources_file).get('sources', {})
     
     def _load_config(self) -> Dict[str, Any]:
         """
@@ -43,14 +214,9 @@ class NewsFetcher:
         Returns:
             Dictionary containing user configuration
         """
-        try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading configuration: {e}")
-            return {}
+        return load_config(self.config_file)
     
-    def fetch_news(self, days: int = 1) -> List[Dict[str, Any]]:
+    def fetch_news(self, days: int = 1) -> List[Article]:
         """
         Fetch news from all configured sources based on user preferences.
         
@@ -74,9 +240,9 @@ class NewsFetcher:
         # Ensure cutoff_date is timezone-naive for consistent comparison
         cutoff_date = datetime.now().replace(tzinfo=None) - timedelta(days=days)
         
-        all_articles = []
-        
-        # Fetch news from each preferred source
+        # Group the feeds of the preferred sources by host, so that feeds on
+        # different hosts are fetched in parallel but each host one at a time
+        feeds_by_host = {}
         for source_id in preferred_sources:
             if source_id not in self.sources:
                 logger.warning(f"Source {source_id} not found in sources configuration")
@@ -86,84 +252,322 @@ class NewsFetcher:
             logger.info(f"Fetching news from {source['name']}")
             
             for feed_info in source.get('rss_feeds', []):
-                try:
-                    # Parse the RSS feed
-                    feed = feedparser.parse(feed_info['url'])
-                    
-                    # Add a small delay to avoid overwhelming the servers
-                    time.sleep(0.5)
-                    
-                    # Process each entry in the feed
-                    for entry in feed.entries:
-                        # Parse the publication date
-                        published = self._parse_date(entry.get('published', ''))
-                        
-                        # Skip articles older than the cutoff date
-                        if published and published < cutoff_date:
-                            continue
-                        
-                        # Create article object
-                        article = {
-                            'title': entry.get('title', 'No title'),
-                            'link': entry.get('link', ''),
-                            'summary': entry.get('summary', entry.get('description', 'No summary available')),
-                            'published': entry.get('published', 'Unknown date'),
-                            'published_parsed': published,
-                            'source': source['name'],
-                            'source_id': source_id,
-                            'category': feed_info.get('category', 'General')
-                        }
-                        
-                        all_articles.append(article)
-                        
-                except Exception as e:
-                    logger.error(f"Error fetching feed {feed_info['url']}: {e}")
+                host = urlparse(feed_info['url']).netloc
+                feeds_by_host.setdefault(host, []).append((source_id, source, feed_info))
+        
+        all_articles = []
+        
+        if feeds_by_host:
+            with ThreadPoolExecutor(max_workers=min(MAX_FEED_WORKERS, len(feeds_by_host))) as executor:
+                futures = [executor.submit(self._fetch_feeds, feeds, cutoff_date) for feeds in feeds_by_host.values()]
+                for future in futures:
+                    all_articles.extend(future.result())
+        
+        self._evict_parse_cache()
+        
+        # Drop stories republished by several feeds before any further processing
+        fetched_count = len(all_articles)
+        all_articles = self._deduplicate(all_articles)
+        if fetched_count:
+            logger.info(f"Removed {fetched_count - len(all_articles)} duplicate articles "
+                        f"({(fetched_count - len(all_articles)) / fetched_count:.0%} of {fetched_count})")
         
         # Sort articles by publication date (newest first)
-        all_articles.sort(key=lambda x: x.get('published_parsed', datetime.min), reverse=True)
+        all_articles.sort(key=attrgetter('published_parsed'), reverse=True)
         
         logger.info(f"Fetched {len(all_articles)} articles from {len(preferred_sources)} sources")
         return all_articles
     
-    def _parse_date(self, date_str: str) -> Optional[datetime]:
+    def _deduplicate(self, articles: List[Article]) -> List[Article]:
         """
-        Parse a date string into a datetime object.
+        Remove duplicate articles, keeping the first occurrence.
+        
+        Articles are identified by their link, or by a hash of their title if they have none.
         
         Args:
-            date_str: Date string from RSS feed
+            articles: List of news articles
             
         Returns:
-            Datetime object or None if parsing fails
+            List of unique news articles
+        """
+        seen = set()
+        unique_articles = []
+        
+        for article in articles:
+            key = article.link or hashlib.blake2b(article.title.lower().encode('utf-8'), digest_size=8).digest()
+            if key in seen:
+                continue
+            seen.add(key)
+            unique_articles.append(article)
+        
+        return unique_articles
+    
+    def _fetch_feeds(self, feeds: List[Tuple[str, Dict[str, Any], Dict[str, Any]]], cutoff_date: datetime) -> List[Article]:
+        """
+        Fetch a group of feeds one after another.
+        
+        Args:
+            feeds: List of (source_id, source, feed_info) tuples
+            cutoff_date: Articles published before this date are skipped
+            
+        Returns:
+            List of news articles from all feeds in the group
+        """
+        articles = []
+        for source_id, source, feed_info in feeds:
+            articles.extend(self._fetch_feed(source_id, source, feed_info, cutoff_date))
+        return articles
+    
+    def _fetch_feed(self, source_id: str, source: Dict[str, Any], feed_info: Dict[str, Any], cutoff_date: datetime) -> List[Article]:
+        """
+        Fetch and parse a single RSS feed.
+        
+        Args:
+            source_id: Identifier of the news source
+            source: Source configuration
+            feed_info: Feed configuration
+            cutoff_date: Articles published before this date are skipped
+            
+        Returns:
+            List of news articles from the feed
+        """
+        articles = []
+        
+        try:
+            # Download the feed separately from parsing it, so connections are pooled
+            content = self._download_feed(feed_info['url'])
+            
+            # Parse the RSS feed, or load the entries parsed from the same content before
+            entries = self._parse_feed(content)
+            
+            # Process each entry in the feed
+            for entry in entries:
+                published = entry['published_parsed']
+                
+                # Skip articles older than the cutoff date
+                if published and published < cutoff_date:
+                    continue
+                
+                # Create article object
+                article = Article(
+                    title=entry['title'],
+                    link=entry['link'],
+                    summary=entry['summary'],
+                    published=entry['published'],
+                    # Articles without a usable date sort last
+                    published_parsed=published or datetime.min,
+                    source=source['name'],
+                    source_id=source_id,
+                    category=feed_info.get('category', 'General')
+                )
+                
+                articles.append(article)
+                
+        except Exception as e:
+            logger.error(f"Error fetching feed {feed_info['url']}: {e}")
+        
+        return articles
+    
+    def _parse_feed(self, content: bytes) -> List[Dict[str, Any]]:
+        """
+        Parse a feed document into its entries, caching the result by content hash.
+        
+        Args:
+            content: The raw feed document
+            
+        Returns:
+            List of entries with title, link, summary and publication dates
         """
-        if not date_str:
-            return None
+        digest = hashlib.blake2b(content, digest_size=16, person=PARSE_CACHE_VERSION).hexdigest()
+        cache_path = os.path.join(self._cache_dir, 'feed_parse', digest + '.pkl')
         
         try:
-            # Try to parse using feedparser's time tuple
-            time_tuple = feedparser._parse_date(date_str)
-            if time_tuple:
-                # Create a timezone-naive datetime object
-                return datetime(*time_tuple[:6]).replace(tzinfo=None)
-        except Exception:
+            with open(cache_path, 'rb') as f:
+                entries = pickle.load(f)
+            # Mark the entry as recently used for eviction
+            os.utime(cache_path)
+            return entries
+        except FileNotFoundError:
             pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parsed feed cache {cache_path}: {e}")
+        
+        try:
+            entries = self._parse_feed_xml(content)
+        except ElementTree.ParseError as e:
+            # Malformed feeds need feedparser's more forgiving parser
+            logger.debug(f"Falling back to feedparser for malformed feed: {e}")
+            entries = self._parse_feed_with_feedparser(content)
+        
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache parsed feed: {e}")
+        
+        return entries
+    
+    def _parse_feed_xml(self, content: bytes) -> List[Dict[str, Any]]:
+        """
+        Parse a well-formed RSS or Atom feed, reading only the fields used for articles.
+        
+        Args:
+            content: The raw feed document
+            
+        Returns:
+            List of entries with title, link, summary and publication dates
+            
+        Raises:
+            xml.etree.ElementTree.ParseError: If the feed is not well-formed XML
+        """
+        entries = []
+        
+        for _, element in ElementTree.iterparse(io.BytesIO(content), events=('end',)):
+            if element.tag not in FEED_ITEM_TAGS:
+                continue
+            
+            # Take the text of the first RSS/Atom element of each field, and the article link:
+            # the text of an RSS <link>, or the href of an Atom alternate <link>
+            fields = {}
+            link = ''
+            for child in element:
+                tag = child.tag
+                if tag in RSS_LINK_TAGS:
+                    if not link:
+                        link = (child.text or '').strip()
+                elif tag in ATOM_LINK_TAGS:
+                    if not link and child.get('rel', 'alternate') == 'alternate':
+                        link = (child.get('href') or '').strip()
+                else:
+                    name = FEED_FIELD_TAGS.get(tag)
+                    if name and name not in fields:
+                        fields[name] = _element_text(child)
+            
+            published = fields.get('pubDate') or fields.get('published') or fields.get('updated') or fields.get('date')
+            entries.append({
+                'title': fields.get('title', 'No title'),
+                'link': link,
+                'summary': fields.get('description') or fields.get('summary') or fields.get('content') or 'No summary available',
+                'published': published or 'Unknown date',
+                'published_parsed': self._parse_date(published or '')
+            })
+            
+            # Release the entry's elements as soon as they have been read
+            element.clear()
+        
+        return entries
+    
+    def _parse_feed_with_feedparser(self, content: bytes) -> List[Dict[str, Any]]:
+        """
+        Parse a feed with feedparser, which also handles malformed feeds.
+        
+        Args:
+            content: The raw feed document
+            
+        Returns:
+            List of entries with title, link, summary and publication dates
+        """
+        import feedparser
         
-        # Try common date formats
-        formats = [
-            '%a, %d %b %Y %H:%M:%S %z',  # RFC 822
-            '%a, %d %b %Y %H:%M:%S %Z',  # RFC 822 with timezone name
-            '%Y-%m-%dT%H:%M:%S%z',       # ISO 8601
-            '%Y-%m-%dT%H:%M:%SZ',        # ISO 8601 UTC
-            '%Y-%m-%d %H:%M:%S',         # Simple format
-            '%a %b %d %H:%M:%S %Y',      # Another common format
-        ]
-        
-        for fmt in formats:
+        feed = feedparser.parse(content)
+        entries = []
+        for entry in feed.entries:
+            entries.append({
+                'title': entry.get('title', 'No title'),
+                'link': entry.get('link', ''),
+                'summary': entry.get('summary', entry.get('description', 'No summary available')),
+                'published': entry.get('published', 'Unknown date'),
+                'published_parsed': self._parse_date(entry.get('published', ''))
+            })
+        return entries
+    
+    def _evict_parse_cache(self) -> None:
+        """
+        Delete the least recently used parsed feeds once the cache grows beyond its size limit.
+        """
+        cache_dir = os.path.join(self._cache_dir, 'feed_parse')
+        try:
+            files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                     for entry in os.scandir(cache_dir) if entry.name.endswith('.pkl')]
+        except FileNotFoundError:
+            return
+        
+        total_size = sum(size for _, size, _ in files)
+        if total_size <= PARSE_CACHE_MAX_BYTES:
+            return
+        
+        for _, size, path in sorted(files):
             try:
-                dt = datetime.strptime(date_str, fmt)
-                # Ensure timezone-naive datetime for consistent comparison
-                return dt.replace(tzinfo=None) if dt.tzinfo else dt
-            except ValueError:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not evict parsed feed {path}: {e}")
                 continue
+            total_size -= size
+            if total_size <= PARSE_CACHE_MAX_BYTES:
+                break
+    
+    def _download_feed(self, url: str, conditional: bool = True) -> bytes:
+        """
+        Download a feed, using a conditional GET when the feed was seen before.
         
-        logger.warning(f"Could not parse date: {date_str}")
-        return None
\ No newline at end of file
+        The ETag and Last-Modified headers of each feed are remembered together
+        with its last body, which is reused when the server answers 304 Not Modified.
+        
+        Args:
+            url: URL of the feed
+            conditional: Whether to send the remembered validators
+            
+        Returns:
+            The raw feed document
+        """
+        body_path = os.path.join(self._cache_dir, 'feeds', hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest() + '.xml')
+        
+        headers = {}
+        state = self._feed_state.get(url, {}) if conditional else {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('modified'):
+            headers['If-Modified-Since'] = state['modified']
+        
+        response = self._http.get(url, headers=headers, timeout=FEED_TIMEOUT)
+        
+        if response.status_code == 304:
+            try:
+                with open(body_path, 'rb') as f:
+                    return f.read()
+            except OSError:
+                logger.warning(f"Cached copy of feed {url} is missing, downloading it again")
+                return self._download_feed(url, conditional=False)
+        
+        response.raise_for_status()
+        content = response.content
+        
+        etag = response.headers.get('ETag')
+        modified = response.headers.get('Last-Modified')
+        if etag or modified:
+            try:
+                os.makedirs(os.path.dirname(body_path), exist_ok=True)
+                tmp_path = body_path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, body_path)
+                self._feed_state.set(url, {'etag': etag, 'modified': modified})
+            except OSError as e:
+                logger.warning(f"Could not cache feed {url}: {e}")
+        
+        return content
+    
+    def _parse_date(self, date_str: str) -> Optional[datetime]:
+        """
+        Parse a date string into a datetime object.
+        
+        Args:
+            date_str: Date string from RSS feed
+            
+        Returns:
+            Datetime object or None if parsing fails
+        """
+        return parse_feed_date(date_str)
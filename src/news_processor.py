@@ -1,6 +1,10 @@
 import logging
 from typing import Dict, List, Any, Optional
 import re
+from operator import attrgetter
+from src.article import Article
+from src.config_cache import load_config
+from src.patterns import compile_match_pattern
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -15,6 +19,11 @@ class NewsProcessor:
         """
         self.config_file = config_file
         self.config = self._load_config()
+        self.pattern = self._compile_pattern()
+        
+        # Per-term matchers for scoring, as every ticker and keyword is credited for its own matches
+        self._ticker_patterns = [re.compile(r'\b' + re.escape(ticker.lower()) + r'\b') for ticker in self.config.get('tickers', [])]
+        self._keywords = [keyword.lower() for keyword in self.config.get('keywords', [])]
         
     def _load_config(self) -> Dict[str, Any]:
         """
@@ -23,15 +32,22 @@ class NewsProcessor:
         Returns:
             Dictionary containing user configuration
         """
-        try:
-            import json
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading configuration: {e}")
-            return {}
+        return load_config(self.config_file)
     
-    def filter_articles(self, articles: List[Dict[str, Any]], filter_by_preferences: bool = True) -> List[Dict[str, Any]]:
+    def _compile_pattern(self) -> Optional[re.Pattern]:
+        """
+        Compile one combined regex pattern matching any ticker or keyword in lowercased text.
+        
+        Returns:
+            Compiled pattern, or None if no tickers or keywords are configured
+        """
+        # Match against lowercased text, so build the pattern from lowercased terms
+        tickers = tuple(sorted({ticker.lower() for ticker in self.config.get('tickers', [])}))
+        keywords = tuple(sorted({keyword.lower() for keyword in self.config.get('keywords', [])}))
+        
+        return compile_match_pattern(tickers, keywords)
+    
+    def filter_articles(self, articles: List[Article], filter_by_preferences: bool = True) -> List[Article]:
         """
         Filter articles based on user preferences (tickers and keywords).
         
@@ -66,30 +82,21 @@ class NewsProcessor:
         
         filtered_articles = []
         
-        # Compile regex patterns for tickers and keywords
-        ticker_patterns = [re.compile(r'\b' + re.escape(ticker) + r'\b', re.IGNORECASE) for ticker in tickers]
-        # Use more flexible matching for keywords (don't require word boundaries)
-        keyword_patterns = [re.compile(re.escape(keyword), re.IGNORECASE) for keyword in keywords]
+        search = self.pattern.search
         
         for article in articles:
-            title = article.get('title', '')
-            summary = article.get('summary', '')
-            content = f"{title} {summary}"
-            
-            # Check if article contains any ticker
-            ticker_match = any(pattern.search(content) for pattern in ticker_patterns) if ticker_patterns else False
-            
-            # Check if article contains any keyword
-            keyword_match = any(pattern.search(content) for pattern in keyword_patterns) if keyword_patterns else False
+            title = article.title
+            summary = article.summary
+            content = f"{title} {summary}".lower()
             
             # If article matches any ticker OR keyword, include it
-            if ticker_match or keyword_match or (not tickers and not keywords):
+            if search(content):
                 filtered_articles.append(article)
         
         logger.info(f"Filtered {len(articles)} articles down to {len(filtered_articles)} relevant articles")
         return filtered_articles
     
-    def rank_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def rank_articles(self, articles: List[Article]) -> List[Article]:
         """
         Rank articles based on relevance to user preferences.
         
@@ -110,34 +117,44 @@ class NewsProcessor:
         if not tickers and not keywords:
             return articles
         
-        # Compile regex patterns for tickers and keywords
-        ticker_patterns = [re.compile(r'\b' + re.escape(ticker) + r'\b', re.IGNORECASE) for ticker in tickers]
-        # Use more flexible matching for keywords (don't require word boundaries)
-        keyword_patterns = [re.compile(re.escape(keyword), re.IGNORECASE) for keyword in keywords]
+        search = self.pattern.search
         
         # Calculate relevance score for each article
         for article in articles:
-            title = article.get('title', '')
-            summary = article.get('summary', '')
-            content = f"{title} {summary}"
-            
-            # Count ticker matches
-            ticker_count = sum(len(pattern.findall(content)) for pattern in ticker_patterns) if ticker_patterns else 0
-            
-            # Count keyword matches
-            keyword_count = sum(len(pattern.findall(content)) for pattern in keyword_patterns) if keyword_patterns else 0
+            title = article.title
+            summary = article.summary
+            content = f"{title} {summary}".lower()
             
-            # Calculate relevance score (title matches count more)
-            title_ticker_count = sum(len(pattern.findall(title)) for pattern in ticker_patterns) if ticker_patterns else 0
-            title_keyword_count = sum(len(pattern.findall(title)) for pattern in keyword_patterns) if keyword_patterns else 0
+            # Articles matching no term at all score 0 without counting each term
+            if not search(content):
+                article.relevance_score = 0
+                continue
             
-            # Final score calculation (title matches have 2x weight)
-            relevance_score = ticker_count + keyword_count + (title_ticker_count + title_keyword_count) * 2
-            
-            # Add score to article
-            article['relevance_score'] = relevance_score
+            # Count the matches of each ticker and keyword in the whole article and in the title,
+            # title matches have 2x weight
+            article.relevance_score = self._count_matches(content) + self._count_matches(title.lower()) * 2
         
         # Sort articles by relevance score (highest first)
-        ranked_articles = sorted(articles, key=lambda x: x.get('relevance_score', 0), reverse=True)
+        ranked_articles = sorted(articles, key=attrgetter('relevance_score'), reverse=True)
+        
+        return ranked_articles
+    
+    def _count_matches(self, text: str) -> int:
+        """
+        Count the matches of the tickers and keywords in lowercased text.
+        
+        Each term is counted separately, so text matching several terms (a ticker that is
+        also a keyword, or a keyword containing another) is credited once per term.
+        
+        Args:
+            text: Lowercased text
+            
+        Returns:
+            Total number of matches
+        """
+        ticker_count = sum(len(pattern.findall(text)) for pattern in self._ticker_patterns)
+        
+        # Keywords match anywhere, so count their occurrences directly
+        keyword_count = sum(text.count(keyword) for keyword in self._keywords if keyword)
         
-        return ranked_articles
\ No newline at end of file
+        return ticker_count + keyword_count
\ No newline at end of file
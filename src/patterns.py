@@ -0,0 +1,59 @@
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+def _alternatives(terms: Tuple[str, ...]) -> str:
+    """
+    Join terms into a regex alternation, longest first so overlapping terms match as much text as possible.
+
+    Args:
+        terms: The terms to match literally
+
+    Returns:
+        Regex alternation of the escaped terms
+    """
+    return '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+
+@lru_cache(maxsize=32)
+def compile_ticker_pattern(tickers: Tuple[str, ...]) -> re.Pattern:
+    """
+    Compile a regex matching any of the tickers as a whole word.
+
+    Compiled patterns are shared by all callers; pass the tickers as a sorted
+    tuple so the same set of tickers always hits the cache.
+
+    Args:
+        tickers: Lowercased tickers to match in lowercased text
+
+    Returns:
+        Compiled pattern
+    """
+    return re.compile(r'\b(?:' + _alternatives(tickers) + r')\b')
+
+@lru_cache(maxsize=32)
+def compile_match_pattern(tickers: Tuple[str, ...], keywords: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """
+    Compile one regex matching any ticker (as a whole word) or any keyword (anywhere).
+
+    Matches are reported in the 'ticker' and 'keyword' named groups. Pass the
+    terms as sorted tuples so the same configuration always hits the cache.
+
+    Args:
+        tickers: Lowercased tickers to match in lowercased text
+        keywords: Lowercased keywords to match in lowercased text
+
+    Returns:
+        Compiled pattern, or None if there are no tickers or keywords
+    """
+    alternatives = []
+    if tickers:
+        alternatives.append(r'(?P<ticker>\b(?:' + _alternatives(tickers) + r')\b)')
+
+    # Use more flexible matching for keywords (don't require word boundaries)
+    if keywords:
+        alternatives.append('(?P<keyword>' + _alternatives(keywords) + ')')
+
+    if not alternatives:
+        return None
+
+    return re.compile('|'.join(alternatives))
@@ -1,12 +1,41 @@
+import hashlib
 import logging
-import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 import re
+from src import json_utils
+from src.article import Article
+from src.config_cache import load_config
+from src.disk_cache import DiskCache
+from src.patterns import compile_ticker_pattern
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Splits text into the words matched by the sentiment word lists
+WORD_PATTERN = re.compile(r'\w+')
+
+# Valid sentiment classifications
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+# Maximum number of texts classified with a single AI request
+AI_BATCH_SIZE = 20
+
+# Number of concurrent AI requests when texts have to be classified one by one
+AI_MAX_WORKERS = 8
+
+# How long (in seconds) AI sentiment classifications are cached
+AI_CACHE_TTL = 7 * 24 * 60 * 60
+
 class SentimentAnalyzer:
+    # Words used by the simple rule-based sentiment analysis
+    POSITIVE_WORDS = frozenset(['up', 'rise', 'gain', 'growth', 'profit', 'positive', 'bullish', 'outperform',
+                                'beat', 'exceed', 'strong', 'success', 'opportunity', 'improve', 'advantage'])
+    
+    NEGATIVE_WORDS = frozenset(['down', 'fall', 'drop', 'decline', 'loss', 'negative', 'bearish', 'underperform',
+                                'miss', 'weak', 'fail', 'risk', 'concern', 'problem', 'challenge'])
+    
     def __init__(self, config_file: str = 'config/config.json'):
         """
         Initialize the SentimentAnalyzer with the user configuration file.
@@ -16,6 +45,8 @@ class SentimentAnalyzer:
         """
         self.config_file = config_file
         self.config = self._load_config()
+        self._ai_client = None
+        self._ai_cache = None
         
     def _load_config(self) -> Dict[str, Any]:
         """
@@ -24,14 +55,9 @@ class SentimentAnalyzer:
         Returns:
             Dictionary containing user configuration
         """
-        try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading configuration: {e}")
-            return {}
+        return load_config(self.config_file)
     
-    def analyze_sentiment(self, articles: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    def analyze_sentiment(self, articles: List[Article]) -> Dict[str, Dict[str, Any]]:
         """
         Analyze sentiment for each article and aggregate by ticker.
         
@@ -53,60 +79,195 @@ class SentimentAnalyzer:
         # Initialize sentiment results for each ticker
         sentiment_results = {ticker: {'positive': 0, 'negative': 0, 'neutral': 0, 'articles': []} for ticker in tickers}
         
-        # Compile regex patterns for tickers
-        ticker_patterns = {ticker: re.compile(r'\b' + re.escape(ticker) + r'\b', re.IGNORECASE) for ticker in tickers}
+        # Get the regex pattern matching any ticker in lowercased text, and map matches back to the configured tickers
+        tickers_by_match = {ticker.lower(): ticker for ticker in tickers}
+        ticker_pattern = compile_ticker_pattern(tuple(sorted(tickers_by_match)))
         
-        # Process each article
+        # Collect the articles that mention at least one ticker
+        findall = ticker_pattern.findall
+        mentions = []
         for article in articles:
-            title = article.get('title', '')
-            summary = article.get('summary', '')
-            content = f"{title} {summary}"
-            
-            # Determine which tickers are mentioned in the article
-            mentioned_tickers = [ticker for ticker, pattern in ticker_patterns.items() if pattern.search(content)]
-            
-            if not mentioned_tickers:
+            # Determine which tickers are mentioned in the title and summary; tickers
+            # are whole words, so no match can span the two fields
+            matches = findall(article.title.lower())
+            matches.extend(findall(article.summary.lower()))
+            if not matches:
                 continue
-                
-            # Analyze sentiment for this article
-            article_sentiment = self._analyze_article_sentiment(content)
             
-            # Update sentiment counts for each mentioned ticker
+            # Only build the text to classify for articles that mention a ticker
+            mentioned_tickers = {tickers_by_match[match] for match in matches}
+            mentions.append((article, mentioned_tickers, f"{article.title} {article.summary}"))
+        
+        # Analyze sentiment for all relevant articles in one batch
+        sentiments = self._analyze_batch([content for _, _, content in mentions])
+        
+        # Update sentiment counts for each mentioned ticker
+        for (article, mentioned_tickers, _), article_sentiment in zip(mentions, sentiments):
             for ticker in mentioned_tickers:
                 sentiment_results[ticker][article_sentiment] += 1
                 sentiment_results[ticker]['articles'].append({
-                    'title': title,
+                    'title': article.title,
                     'sentiment': article_sentiment,
-                    'source': article.get('source', 'Unknown'),
-                    'link': article.get('link', '')
+                    'source': article.source,
+                    'link': article.link
                 })
         
         return sentiment_results
     
-    def _analyze_article_sentiment(self, text: str) -> str:
+    def _analyze_batch(self, texts: List[str]) -> List[str]:
         """
-        Analyze the sentiment of an article text.
+        Analyze the sentiment of several article texts, classifying each distinct text only once.
         
         Args:
-            text: The article text to analyze
+            texts: The article texts to analyze
             
         Returns:
-            Sentiment classification ('positive', 'negative', or 'neutral')
+            Sentiment classifications in the same order as the texts
         """
+        unique_texts = list(dict.fromkeys(texts))
+        
         # Check if we should use the AI model for sentiment analysis
         if self.config.get('sentiment', {}).get('use_ai', False):
-            return self._analyze_sentiment_with_ai(text)
+            results = self._analyze_batch_with_ai(unique_texts)
+        else:
+            results = {text: self._analyze_sentiment_with_rules(text) for text in unique_texts}
+        
+        return [results[text] for text in texts]
+    
+    def _get_ai_client(self):
+        """
+        Get the AI client, creating it on first use so its connection pool is reused.
+        
+        Returns:
+            The groq client
+        """
+        if self._ai_client is None:
+            # Use the same AI client as the summarizer
+            import groq
+            
+            self._ai_client = groq.Client(api_key=self.config.get('ai', {}).get('api_key', ''))
+        return self._ai_client
+    
+    def _get_ai_cache(self) -> DiskCache:
+        """
+        Get the cache of AI sentiment classifications, loading it on first use.
+        
+        Returns:
+            The sentiment cache
+        """
+        if self._ai_cache is None:
+            cache_dir = self.config.get('cache', {}).get('directory', 'cache')
+            self._ai_cache = DiskCache(os.path.join(cache_dir, 'sentiment.json'))
+        return self._ai_cache
+    
+    def _analyze_batch_with_ai(self, texts: List[str]) -> Dict[str, str]:
+        """
+        Analyze the sentiment of several distinct texts with the AI model, using as few requests as possible.
+        
+        Texts classified on a previous run are taken from the cache, the rest are sent
+        in batches and classified one by one only if a batch answer cannot be parsed.
+        
+        Args:
+            texts: The distinct texts to analyze
+            
+        Returns:
+            Dictionary mapping each text to its sentiment classification
+        """
+        model = self.config.get('ai', {}).get('model', 'llama3-8b-8192')
+        cache = self._get_ai_cache()
+        keys = {text: hashlib.blake2b(f"{model}\n{text}".encode('utf-8'), digest_size=16).hexdigest() for text in texts}
+        
+        results = {}
+        pending = []
+        for text in texts:
+            cached = cache.get(keys[text])
+            if cached in SENTIMENTS:
+                results[text] = cached
+            else:
+                pending.append(text)
+        
+        if not pending:
+            return results
+        
+        classified = {}
+        for start in range(0, len(pending), AI_BATCH_SIZE):
+            batch = pending[start:start + AI_BATCH_SIZE]
+            sentiments = self._classify_batch_with_ai(batch)
+            
+            if sentiments is None:
+                # Fall back to one request per text, issued concurrently
+                with ThreadPoolExecutor(max_workers=min(AI_MAX_WORKERS, len(batch))) as executor:
+                    sentiments = list(executor.map(self._analyze_sentiment_with_ai, batch))
+            else:
+                classified.update((keys[text], sentiment) for text, sentiment in zip(batch, sentiments))
+            
+            results.update(zip(batch, sentiments))
         
-        # Simple rule-based sentiment analysis as fallback
-        positive_words = ['up', 'rise', 'gain', 'growth', 'profit', 'positive', 'bullish', 'outperform', 
-                         'beat', 'exceed', 'strong', 'success', 'opportunity', 'improve', 'advantage']
+        # Only cache answers from successful batch requests, as single requests fall back to rules on errors
+        if classified:
+            cache.set_many(classified, expire=AI_CACHE_TTL)
         
-        negative_words = ['down', 'fall', 'drop', 'decline', 'loss', 'negative', 'bearish', 'underperform',
-                         'miss', 'weak', 'fail', 'risk', 'concern', 'problem', 'challenge']
+        return results
+    
+    def _classify_batch_with_ai(self, texts: List[str]) -> Optional[List[str]]:
+        """
+        Classify several texts with a single AI request.
+        
+        Args:
+            texts: The texts to analyze
+            
+        Returns:
+            Sentiment classifications in the same order as the texts, or None if the request or its answer failed
+        """
+        try:
+            client = self._get_ai_client()
+            model = self.config.get('ai', {}).get('model', 'llama3-8b-8192')
+            
+            # Create a numbered prompt asking for one label per text
+            numbered_texts = '\n'.join(f"{i}. {' '.join(text.split())}" for i, text in enumerate(texts, 1))
+            prompt = (f"Analyze the sentiment of each of the following {len(texts)} financial news texts regarding "
+                      "stock market or company performance. Return only a JSON array with one of "
+                      "\"positive\", \"negative\" or \"neutral\" for each text, in the same order.\n\n"
+                      f"{numbered_texts}")
+            
+            response = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": "You are a financial sentiment analyzer that classifies text as positive, negative, or neutral."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,
+                max_tokens=10 * len(texts)
+            )
+            
+            # Extract the JSON array from the response
+            content = response.choices[0].message.content
+            sentiments = json_utils.loads(content[content.index('['):content.rindex(']') + 1])
+            sentiments = [str(sentiment).strip().lower() for sentiment in sentiments]
+            
+            if len(sentiments) != len(texts) or any(sentiment not in SENTIMENTS for sentiment in sentiments):
+                raise ValueError(f"expected {len(texts)} sentiment labels, got {content!r}")
+            
+            return sentiments
+            
+        except Exception as e:
+            logger.warning(f"Error analyzing sentiment batch with AI, classifying texts one by one: {e}")
+            return None
+    
+    def _analyze_sentiment_with_rules(self, text: str) -> str:
+        """
+        Analyze sentiment by counting positive and negative words.
         
-        # Count occurrences of positive and negative words
-        positive_count = sum(1 for word in positive_words if re.search(r'\b' + re.escape(word) + r'\b', text.lower()))
-        negative_count = sum(1 for word in negative_words if re.search(r'\b' + re.escape(word) + r'\b', text.lower()))
+        Args:
+            text: The text to analyze
+            
+        Returns:
+            Sentiment classification ('positive', 'negative', or 'neutral')
+        """
+        # Tokenize the text once and look the words up in the word sets
+        words = set(WORD_PATTERN.findall(text.lower()))
+        positive_count = len(words & self.POSITIVE_WORDS)
+        negative_count = len(words & self.NEGATIVE_WORDS)
         
         # Determine sentiment based on counts
         if positive_count > negative_count:
@@ -127,12 +288,8 @@ class SentimentAnalyzer:
             Sentiment classification ('positive', 'negative', or 'neutral')
         """
         try:
-            # Use the same AI client as the summarizer
-            import groq
-            
-            ai_config = self.config.get('ai', {})
-            client = groq.Client(api_key=ai_config.get('api_key', ''))
-            model = ai_config.get('model', 'llama3-8b-8192')
+            client = self._get_ai_client()
+            model = self.config.get('ai', {}).get('model', 'llama3-8b-8192')
             
             # Create a prompt for sentiment analysis
             prompt = f"""Analyze the sentiment of the following financial news text regarding stock market or company performance. 
@@ -165,4 +322,4 @@ class SentimentAnalyzer:
         except Exception as e:
             logger.error(f"Error analyzing sentiment with AI: {e}")
             # Fall back to rule-based analysis
-            return self._analyze_article_sentiment(text)
\ No newline at end of file
+            return self._analyze_sentiment_with_rules(text)
\ No newline at end of file
@@ -1,12 +1,72 @@
+import asyncio
 import logging
-import json
-from typing import Dict, List, Any, Optional
-import requests
-from datetime import datetime, timedelta
+import math
+import os
+import threading
+import time
+from array import array
+from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from src import json_utils
+from src.config_cache import load_config
+from src.disk_cache import DiskCache
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Maximum number of tickers fetched in parallel
+MAX_FETCH_WORKERS = 16
+
+# Connect and read timeouts (in seconds) for stock price API requests
+HTTP_TIMEOUT = (3.05, 8)
+
+# Pooled connections per host, enough for the fetch workers and the asyncio default executor (at most 32 threads)
+HTTP_POOL_SIZE = 32
+
+# Quote endpoints of the supported providers
+ALPHAVANTAGE_URL = 'https://www.alphavantage.co/query'
+FINNHUB_QUOTE_URL = 'https://finnhub.io/api/v1/quote'
+
+# Maximum number of symbols per Alpha Vantage bulk quote request
+BULK_BATCH_SIZE = 100
+
+# Default lifetimes (in seconds) of cached quotes while the US market is open and closed
+QUOTE_TTL_OPEN = 60
+QUOTE_TTL_CLOSED = 15 * 60
+
+# Quotes shared by all fetchers in the process, by provider and ticker: (fresh until, price data)
+_quote_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_quote_cache_lock = threading.Lock()
+
+def _to_float(value: Any) -> Optional[float]:
+    """
+    Convert a quote field to a float.
+    
+    Args:
+        value: The field value, either a number or a numeric string optionally ending in '%'
+        
+    Returns:
+        The number, or None if the value is missing or not numeric
+    """
+    try:
+        return float(value.rstrip('%') if isinstance(value, str) else value)
+    except (TypeError, ValueError):
+        return None
+
+def _to_int(value: Any) -> Optional[int]:
+    """
+    Convert a quote field to an int.
+    
+    Args:
+        value: The field value, either a number or a numeric string
+        
+    Returns:
+        The number, or None if the value is missing or not numeric
+    """
+    number = _to_float(value)
+    return int(number) if number is not None else None
+
 class StockPriceFetcher:
     def __init__(self, config_file: str = 'config/config.json'):
         """
@@ -19,6 +79,62 @@ class StockPriceFetcher:
         self.config = self._load_config()
         self.api_key = self.config.get('stock_prices', {}).get('api_key', '')
         self.provider = self.config.get('stock_prices', {}).get('provider', 'alphavantage')
+        self._session = None
+        self._session_lock = threading.Lock()
+        
+        # Request URLs with the API key filled in, so each request only adds the symbol
+        self._av_url_tmpl = f"{ALPHAVANTAGE_URL}?function=GLOBAL_QUOTE&apikey={self.api_key}&symbol={{}}"
+        self._av_bulk_url_tmpl = f"{ALPHAVANTAGE_URL}?function=REALTIME_BULK_QUOTES&apikey={self.api_key}&symbol={{}}"
+        self._finnhub_url_tmpl = f"{FINNHUB_QUOTE_URL}?token={self.api_key}&symbol={{}}"
+        self.ttl_open = self.config.get('stock_prices', {}).get('cache_ttl_open', QUOTE_TTL_OPEN)
+        self.ttl_closed = self.config.get('stock_prices', {}).get('cache_ttl_closed', QUOTE_TTL_CLOSED)
+        self.bulk = self.config.get('stock_prices', {}).get('bulk', False)
+        cache_dir = self.config.get('cache', {}).get('directory', 'cache')
+        self._last_good_quotes = DiskCache(os.path.join(cache_dir, 'stock_quotes.json'))
+        
+        # Freshly fetched quotes not yet saved as last known good quotes, written once per fetch
+        self._unsaved_quotes: Dict[str, Dict[str, Any]] = {}
+        self._unsaved_quotes_lock = threading.Lock()
+        
+    @property
+    def session(self) -> Any:
+        """
+        The pooled HTTP session, created on first use so requests is only imported when prices are fetched.
+        
+        Returns:
+            Configured requests session
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_http_session()
+        return self._session
+    
+    def _create_http_session(self) -> Any:
+        """
+        Create a pooled HTTP session so requests to the price API reuse connections.
+        
+        Returns:
+            Configured requests session
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.2, status_forcelist=(429, 502, 503, 504),
+                        allowed_methods=frozenset({'GET'}))
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retries)
+        session.mount('https://', adapter)
+        return session
+    
+    def close(self) -> None:
+        """
+        Release the pooled HTTP connections.
+        """
+        if self._session is not None:
+            self._session.close()
+            self._session = None
         
     def _load_config(self) -> Dict[str, Any]:
         """
@@ -27,44 +143,119 @@ class StockPriceFetcher:
         Returns:
             Dictionary containing user configuration
         """
-        try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading configuration: {e}")
-            return {}
+        return load_config(self.config_file)
     
-    def fetch_stock_prices(self) -> Dict[str, Dict[str, Any]]:
+    def _get_tickers(self) -> List[str]:
         """
-        Fetch current stock prices for the tickers specified in the configuration.
+        Get the tickers to fetch prices for, if stock price fetching is configured.
         
         Returns:
-            Dictionary with stock price data by ticker
+            List of ticker symbols, empty if there is nothing to fetch
         """
         tickers = self.config.get('tickers', [])
         if not tickers:
             logger.warning("No tickers specified in configuration for stock price fetching")
-            return {}
+            return []
         
         if not self.api_key:
             logger.warning("No API key configured for stock price fetching")
+            return []
+        
+        return tickers
+    
+    def fetch_stock_prices(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch current stock prices for the tickers specified in the configuration.
+        
+        Returns:
+            Dictionary with stock price data by ticker
+        """
+        tickers = self._get_tickers()
+        if not tickers:
             return {}
         
-        stock_prices = {}
+        if self.bulk:
+            self._prefetch_bulk(tickers)
+        
+        results = {}
+        
+        # Fetch all tickers concurrently, as each fetch mostly waits on the network
+        try:
+            with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(tickers))) as executor:
+                futures = {executor.submit(self._fetch_ticker_price, ticker): ticker for ticker in tickers}
+                for future in as_completed(futures):
+                    ticker = futures[future]
+                    try:
+                        results[ticker] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error fetching price for {ticker}: {e}")
+        finally:
+            self._save_last_good_quotes()
+        
+        # Keep the configured ticker order
+        return {ticker: results[ticker] for ticker in tickers if results.get(ticker)}
+    
+    def fetch_stock_prices_frame(self) -> Dict[str, Any]:
+        """
+        Fetch current stock prices as columns, for aggregating over many tickers.
+        
+        Returns:
+            Dictionary with the 'tickers' list, 'price', 'change' and 'percent_change' arrays
+            of doubles (NaN where a value is missing) and the 'volume' list, in ticker order
+        """
+        stock_prices = self.fetch_stock_prices()
+        quotes = stock_prices.values()
+        
+        def column(field: str) -> array:
+            values = (_to_float(quote.get(field)) for quote in quotes)
+            return array('d', (math.nan if value is None else value for value in values))
         
-        for ticker in tickers:
-            try:
-                price_data = self._fetch_ticker_price(ticker)
-                if price_data:
-                    stock_prices[ticker] = price_data
-            except Exception as e:
-                logger.error(f"Error fetching price for {ticker}: {e}")
+        return {
+            'tickers': list(stock_prices),
+            'price': column('price'),
+            'change': column('change'),
+            'percent_change': column('percent_change'),
+            'volume': [quote.get('volume') for quote in quotes]
+        }
+    
+    async def fetch_stock_prices_async(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch current stock prices from within an asyncio event loop.
+        
+        The blocking requests run in the loop's default executor, sharing the
+        pooled session, so the event loop stays free while prices are fetched.
+        
+        Returns:
+            Dictionary with stock price data by ticker
+        """
+        tickers = self._get_tickers()
+        if not tickers:
+            return {}
+        
+        loop = asyncio.get_running_loop()
+        try:
+            if self.bulk:
+                await loop.run_in_executor(None, self._prefetch_bulk, tickers)
+            
+            results = await asyncio.gather(
+                *(loop.run_in_executor(None, self._fetch_ticker_price, ticker) for ticker in tickers),
+                return_exceptions=True
+            )
+        finally:
+            await loop.run_in_executor(None, self._save_last_good_quotes)
+        
+        stock_prices = {}
+        for ticker, price_data in zip(tickers, results):
+            if isinstance(price_data, Exception):
+                logger.error(f"Error fetching price for {ticker}: {price_data}")
+            elif price_data:
+                stock_prices[ticker] = price_data
         
         return stock_prices
     
     def _fetch_ticker_price(self, ticker: str) -> Dict[str, Any]:
         """
-        Fetch price data for a specific ticker.
+        Fetch price data for a specific ticker, reusing a recently fetched quote.
         
         Args:
             ticker: The stock ticker symbol
@@ -72,13 +263,99 @@ class StockPriceFetcher:
         Returns:
             Dictionary with price data
         """
+        key = f"{self.provider}:{ticker}"
+        cached = self._fresh_quote(key)
+        if cached:
+            return cached
+        
         if self.provider == 'alphavantage':
-            return self._fetch_from_alphavantage(ticker)
+            price_data = self._fetch_from_alphavantage(ticker)
         elif self.provider == 'finnhub':
-            return self._fetch_from_finnhub(ticker)
+            price_data = self._fetch_from_finnhub(ticker)
         else:
             logger.error(f"Unsupported stock price provider: {self.provider}")
             return {}
+        
+        if not price_data:
+            return self._last_good_quote(key, ticker)
+        
+        self._store_quotes({key: price_data})
+        return price_data
+    
+    def _fresh_quote(self, key: str) -> Dict[str, Any]:
+        """
+        Get a quote from the in-process cache if it is still fresh.
+        
+        Args:
+            key: Cache key of the ticker
+            
+        Returns:
+            Dictionary with price data, or an empty dictionary
+        """
+        with _quote_cache_lock:
+            cached = _quote_cache.get(key)
+        if cached and cached[0] > time.time():
+            return cached[1]
+        return {}
+    
+    def _store_quotes(self, quotes: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Remember freshly fetched quotes in process, and queue them to be saved as last known good quotes.
+        
+        Args:
+            quotes: Price data by cache key
+        """
+        now = time.time()
+        fresh_until = now + self._quote_ttl()
+        with _quote_cache_lock:
+            for key, price_data in quotes.items():
+                _quote_cache[key] = (fresh_until, price_data)
+        with self._unsaved_quotes_lock:
+            self._unsaved_quotes.update((key, {'fetched_at': now, 'data': price_data}) for key, price_data in quotes.items())
+    
+    def _save_last_good_quotes(self) -> None:
+        """
+        Save the quotes fetched since the last save as last known good quotes, with a single cache write.
+        """
+        with self._unsaved_quotes_lock:
+            quotes, self._unsaved_quotes = self._unsaved_quotes, {}
+        if quotes:
+            self._last_good_quotes.set_many(quotes)
+    
+    def _last_good_quote(self, key: str, ticker: str) -> Dict[str, Any]:
+        """
+        Get the last successfully fetched quote for a ticker, for when fetching a fresh one fails.
+        
+        Args:
+            key: Cache key of the ticker
+            ticker: The stock ticker symbol
+            
+        Returns:
+            Dictionary with the stale price data flagged with stale=True, or an empty dictionary
+        """
+        entry = self._last_good_quotes.get(key)
+        if not entry:
+            return {}
+        
+        fetched_at = datetime.fromtimestamp(entry['fetched_at']).strftime('%Y-%m-%d %H:%M')
+        logger.warning(f"Using last known price for {ticker} fetched at {fetched_at}")
+        return dict(entry['data'], stale=True)
+    
+    def _quote_ttl(self) -> float:
+        """
+        Get how long a freshly fetched quote stays valid.
+        
+        Quotes change constantly while the US market is open (9:30-16:00 ET on
+        weekdays) and hardly at all otherwise, so they are kept longer when it is closed.
+        
+        Returns:
+            Lifetime of the quote in seconds
+        """
+        import pytz
+        
+        now = datetime.now(pytz.timezone('America/New_York'))
+        market_open = now.weekday() < 5 and (9, 30) <= (now.hour, now.minute) < (16, 0)
+        return self.ttl_open if market_open else self.ttl_closed
     
     def _fetch_from_alphavantage(self, ticker: str) -> Dict[str, Any]:
         """
@@ -91,17 +368,16 @@ class StockPriceFetcher:
             Dictionary with price data
         """
         try:
-            url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={ticker}&apikey={self.api_key}"
-            response = requests.get(url)
-            data = response.json()
+            response = self.session.get(self._av_url_tmpl.format(ticker), timeout=HTTP_TIMEOUT)
+            data = json_utils.loads(response.content)
             
             if 'Global Quote' in data and data['Global Quote']:
                 quote = data['Global Quote']
                 return {
-                    'price': quote.get('05. price', 'N/A'),
-                    'change': quote.get('09. change', 'N/A'),
-                    'percent_change': quote.get('10. change percent', 'N/A').replace('%', ''),
-                    'volume': quote.get('06. volume', 'N/A'),
+                    'price': _to_float(quote.get('05. price')),
+                    'change': _to_float(quote.get('09. change')),
+                    'percent_change': _to_float(quote.get('10. change percent')),
+                    'volume': _to_int(quote.get('06. volume')),
                     'latest_trading_day': quote.get('07. latest trading day', 'N/A')
                 }
             else:
@@ -112,6 +388,62 @@ class StockPriceFetcher:
             logger.error(f"Error fetching from Alpha Vantage for {ticker}: {e}")
             return {}
     
+    def _prefetch_bulk(self, tickers: List[str]) -> None:
+        """
+        Fetch quotes for many tickers with as few requests as possible, where the provider supports it.
+        
+        The quotes are stored in the quote cache, where the per-ticker fetches pick them up;
+        tickers missing from the bulk responses are then fetched one by one as usual.
+        
+        Args:
+            tickers: The stock ticker symbols
+        """
+        if self.provider != 'alphavantage':
+            logger.warning(f"Bulk quotes are not supported for {self.provider}, fetching tickers one by one")
+            return
+        
+        pending = [ticker for ticker in tickers if not self._fresh_quote(f"{self.provider}:{ticker}")]
+        for start in range(0, len(pending), BULK_BATCH_SIZE):
+            quotes = self._fetch_bulk_from_alphavantage(pending[start:start + BULK_BATCH_SIZE])
+            if quotes:
+                self._store_quotes({f"{self.provider}:{ticker}": price_data for ticker, price_data in quotes.items()})
+    
+    def _fetch_bulk_from_alphavantage(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch stock prices for up to 100 tickers with one Alpha Vantage REALTIME_BULK_QUOTES request.
+        
+        Args:
+            tickers: The stock ticker symbols
+            
+        Returns:
+            Dictionary with price data by ticker, empty if the request failed
+        """
+        try:
+            response = self.session.get(self._av_bulk_url_tmpl.format(','.join(tickers)), timeout=HTTP_TIMEOUT)
+            data = json_utils.loads(response.content)
+            
+            if not data.get('data'):
+                logger.warning(f"No bulk price data returned from Alpha Vantage: {data.get('message') or data.get('Information', '')}")
+                return {}
+            
+            quotes = {}
+            for quote in data['data']:
+                symbol = quote.get('symbol')
+                if not symbol:
+                    continue
+                quotes[symbol] = {
+                    'price': _to_float(quote.get('close')),
+                    'change': _to_float(quote.get('change')),
+                    'percent_change': _to_float(quote.get('change_percent')),
+                    'volume': _to_int(quote.get('volume')),
+                    'latest_trading_day': (quote.get('timestamp') or 'N/A')[:10]
+                }
+            return quotes
+                
+        except Exception as e:
+            logger.error(f"Error fetching bulk quotes from Alpha Vantage: {e}")
+            return {}
+    
     def _fetch_from_finnhub(self, ticker: str) -> Dict[str, Any]:
         """
         Fetch stock price from Finnhub API.
@@ -123,9 +455,8 @@ class StockPriceFetcher:
             Dictionary with price data
         """
         try:
-            url = f"https://finnhub.io/api/v1/quote?symbol={ticker}&token={self.api_key}"
-            response = requests.get(url)
-            data = response.json()
+            response = self.session.get(self._finnhub_url_tmpl.format(ticker), timeout=HTTP_TIMEOUT)
+            data = json_utils.loads(response.content)
             
             if 'c' in data:  # Current price
                 current_price = data['c']
@@ -134,10 +465,10 @@ class StockPriceFetcher:
                 percent_change = (change / previous_close) * 100 if previous_close != 0 else 0
                 
                 return {
-                    'price': f"{current_price:.2f}",
-                    'change': f"{change:.2f}",
-                    'percent_change': f"{percent_change:.2f}",
-                    'volume': str(data.get('v', 'N/A')),
+                    'price': float(current_price),
+                    'change': round(change, 2),
+                    'percent_change': round(percent_change, 2),
+                    'volume': _to_int(data.get('v')),
                     'latest_trading_day': datetime.now().strftime('%Y-%m-%d')
                 }
             else:
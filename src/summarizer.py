@@ -1,12 +1,97 @@
-import json
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
-import groq
+import os
+import random
+import re
+import time
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Any, Optional
+from src.article import Article
+from src.config_cache import load_config
+from src.disk_cache import DiskCache
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Default lifetime (in seconds) of cached summaries
+SUMMARY_CACHE_TTL = 15 * 60
+
+# Maximum length of an article summary included in the prompt
+MAX_ARTICLE_SUMMARY_CHARS = 500
+
+# Default budget of estimated prompt tokens (about 4 characters each) for the articles
+PROMPT_TOKEN_BUDGET = 6000
+
+# Minimum number of articles per shard when summarizing articles in shards
+MIN_ARTICLES_PER_SHARD = 5
+
+# Tags delimiting reasoning blocks that are removed from the summaries
+THINK_OPEN = '<think>'
+THINK_CLOSE = '</think>'
+THINK_BLOCK_PATTERN = re.compile(f'{THINK_OPEN}.*?{THINK_CLOSE}', re.DOTALL)
+
+# Runs of whitespace spanning empty lines, collapsed into a single empty line
+BLANK_LINES_PATTERN = re.compile(r'\n\s*\n')
+
+# Attempts and backoff bounds (in seconds) for Groq requests failing with transient errors
+GROQ_MAX_ATTEMPTS = 4
+GROQ_MIN_BACKOFF = 1
+GROQ_MAX_BACKOFF = 20
+
 class Summarizer:
+    # Prompt templates, filled in with str.format_map
+    PROMPT_ALL = """Please provide a concise summary of the following financial news articles.
+
+Here are the articles to summarize:
+
+{articles_text}
+
+Please create a well-structured summary that:
+1. Identifies key market trends and insights
+2. Organizes information by topic or relevance
+3. Is concise and easy to read (around {summary_length} words)
+4. Includes a brief market outlook based on the news"""
+    
+    PROMPT_FOCUSED = """Please provide a concise summary of the following financial news articles.
+
+Focus on these stocks/tickers of interest: {tickers}
+And these keywords/topics: {keywords}
+
+Here are the articles to summarize:
+
+{articles_text}
+
+Please create a well-structured summary that:
+1. Highlights the most important news for the specified tickers
+2. Identifies key market trends and insights
+3. Organizes information by topic or relevance
+4. Is concise and easy to read (around {summary_length} words)
+5. Includes a brief market outlook based on the news"""
+    
+    # Prompt summarizing one shard of the articles when summarizing in shards
+    PROMPT_MAP = """Please summarize the key points of the following financial news articles as a short list of notes.
+{focus}
+Here are the articles to summarize:
+
+{articles_text}
+
+Keep each note brief and factual, and mention the companies and tickers involved."""
+    
+    # Prompt merging the notes of all shards into the final summary
+    PROMPT_REDUCE = """Please provide a concise summary of financial news, based on the following notes taken from groups of news articles.
+{focus}
+Here are the notes:
+
+{partials}
+
+Please create a well-structured summary that:
+1. Identifies key market trends and insights
+2. Organizes information by topic or relevance
+3. Is concise and easy to read (around {summary_length} words)
+4. Includes a brief market outlook based on the news"""
+    
     def __init__(self, config_file: str = 'config/config.json'):
         """
         Initialize the Summarizer with the user configuration file.
@@ -16,8 +101,31 @@ class Summarizer:
         """
         self.config_file = config_file
         self.config = self._load_config()
+        self.aclient = None
         self.client = self._initialize_ai_client()
         
+        # Resolve the summary settings once
+        ai_config = self.config.get('ai', {})
+        self.model = ai_config.get('model', 'llama3-8b-8192')  # Get model from config or use default
+        self.max_tokens = ai_config.get('max_tokens', 8192)  # Get max_tokens from config or use default value
+        self.summary_length = ai_config.get('summary_length', '300-1000')
+        self.max_prompt_tokens = ai_config.get('max_prompt_tokens', PROMPT_TOKEN_BUDGET)
+        self.shards = ai_config.get('shards', 1)
+        self.tickers = self.config.get('tickers', [])
+        self.keywords = self.config.get('keywords', [])
+        self._tickers_text = ', '.join(self.tickers)
+        self._keywords_text = ', '.join(self.keywords)
+        self.system_prompt = "You are a financial news analyst assistant that provides concise, informative summaries of financial news. Focus on key information relevant to investors and market trends."
+        
+        if self.client:
+            logger.info(f"AI client model {self.model} loaded")
+            logger.info(f"Using max_tokens: {self.max_tokens}")
+        
+        # Cache of generated summaries, so re-runs on the same articles don't call the AI again
+        self.cache_ttl = ai_config.get('cache_ttl', SUMMARY_CACHE_TTL)
+        cache_dir = self.config.get('cache', {}).get('directory', 'cache')
+        self._summary_cache = DiskCache(os.path.join(cache_dir, 'summaries.json')) if self.cache_ttl else None
+        
     def _load_config(self) -> Dict[str, Any]:
         """
         Load user configuration from the configuration file.
@@ -25,16 +133,11 @@ class Summarizer:
         Returns:
             Dictionary containing user configuration
         """
-        try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading configuration: {e}")
-            return {}
+        return load_config(self.config_file)
     
-    def _initialize_ai_client(self) -> Optional[groq.Client]:
+    def _initialize_ai_client(self) -> Optional[Any]:
         """
-        Initialize the AI client based on the configuration.
+        Initialize the AI client based on the configuration, along with the async client used by generate_summary_async.
         
         Returns:
             AI client instance or None if initialization fails
@@ -50,12 +153,18 @@ class Summarizer:
             return None
         
         try:
-            return groq.Client(api_key=ai_config['api_key'])
+            # Import the Groq SDK (and its httpx/pydantic dependencies) only when a client is needed
+            import groq
+            
+            # Retries are handled by _call_groq and _call_groq_async
+            client = groq.Client(api_key=ai_config['api_key'], max_retries=0)
+            self.aclient = groq.AsyncGroq(api_key=ai_config['api_key'], max_retries=0)
+            return client
         except Exception as e:
             logger.error(f"Error initializing Groq client: {e}")
             return None
     
-    def generate_summary(self, articles: List[Dict[str, Any]], use_all_articles: bool = False) -> str:
+    def generate_summary(self, articles: List[Article], use_all_articles: bool = False) -> str:
         """
         Generate a summary of the news articles using AI.
         
@@ -76,23 +185,19 @@ class Summarizer:
         # Prepare the prompt for the AI
         prompt = self._prepare_prompt(articles, use_all_articles)
         
+        # Reuse the summary of an identical request
+        cache_key = self._cache_key(prompt)
+        cached = self._get_cached_summary(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
+            # Summarize large article sets in shards first
+            if self._shard_count(articles) > 1:
+                prompt = self._summarize_shards(articles, use_all_articles)
+            
             # Use Groq's LLM API to generate the summary
-            model = self.config['ai'].get('model', 'llama3-8b-8192')  # Get model from config or use default
-            logger.info(f"AI client model {model} loaded")
-            # Get max_tokens from config or use default value
-            max_tokens = self.config['ai'].get('max_tokens', 8192)
-            logger.info(f"Using max_tokens: {max_tokens}")
-            
-            response = self.client.chat.completions.create(
-                model=model,  # Using model specified in config
-                messages=[
-                    {"role": "system", "content": "You are a financial news analyst assistant that provides concise, informative summaries of financial news. Focus on key information relevant to investors and market trends."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=max_tokens
-            )
+            response = self._call_groq(prompt)
             
             # Get the response content
             content = response.choices[0].message.content
@@ -100,14 +205,435 @@ class Summarizer:
             # Filter out any <think> blocks from the response
             filtered_content = self._filter_think_blocks(content)
             
+            if self._summary_cache is not None:
+                self._summary_cache.set(cache_key, filtered_content, expire=self.cache_ttl)
+            
+            return filtered_content
+        except Exception as e:
+            logger.error(f"Error generating summary: {e}")
+            return "Error: Unable to generate summary at this time."
+    
+    async def generate_summary_async(self, articles: List[Article], use_all_articles: bool = False) -> str:
+        """
+        Generate a summary of the news articles using AI without blocking the event loop.
+        
+        Args:
+            articles: List of news articles
+            use_all_articles: Whether to use all articles without focusing on specific tickers/keywords
+            
+        Returns:
+            Summary text
+        """
+        if not self.aclient:
+            logger.error("AI client not initialized")
+            return "Error: AI summarization service not available."
+        
+        if not articles:
+            return "No relevant news articles found for your preferences."
+        
+        # Prepare the prompt for the AI
+        prompt = self._prepare_prompt(articles, use_all_articles)
+        
+        # Reuse the summary of an identical request
+        cache_key = self._cache_key(prompt)
+        cached = self._get_cached_summary(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            # Summarize large article sets in shards first
+            if self._shard_count(articles) > 1:
+                prompt = await self._summarize_shards_async(articles, use_all_articles)
+            
+            response = await self._call_groq_async(prompt)
+            
+            # Filter out any <think> blocks from the response
+            filtered_content = self._filter_think_blocks(response.choices[0].message.content)
+            
+            if self._summary_cache is not None:
+                self._summary_cache.set(cache_key, filtered_content, expire=self.cache_ttl)
+            
             return filtered_content
         except Exception as e:
             logger.error(f"Error generating summary: {e}")
             return "Error: Unable to generate summary at this time."
     
+    def generate_summary_stream(self, articles: List[Article], use_all_articles: bool = False) -> Iterator[str]:
+        """
+        Generate a summary of the news articles using AI, yielding the text as it arrives.
+        
+        <think> blocks are dropped and whitespace is normalized as the text streams in, so
+        callers can start displaying the summary before the whole completion has been
+        received; ''.join() of the pieces gives the same text as generate_summary.
+        
+        Args:
+            articles: List of news articles
+            use_all_articles: Whether to use all articles without focusing on specific tickers/keywords
+            
+        Yields:
+            Successive pieces of the summary text
+        """
+        if not self.client:
+            logger.error("AI client not initialized")
+            yield "Error: AI summarization service not available."
+            return
+        
+        if not articles:
+            yield "No relevant news articles found for your preferences."
+            return
+        
+        # Prepare the prompt for the AI
+        prompt = self._prepare_prompt(articles, use_all_articles)
+        
+        # Reuse the summary of an identical request
+        cache_key = self._cache_key(prompt)
+        cached = self._get_cached_summary(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        try:
+            # Summarize large article sets in shards first, and stream the merged summary
+            if self._shard_count(articles) > 1:
+                prompt = self._summarize_shards(articles, use_all_articles)
+            
+            stream = self._call_groq(prompt, stream=True)
+            pieces = (chunk.choices[0].delta.content or '' for chunk in stream)
+            
+            # Apply the same post-processing as generate_summary while the text streams in
+            for text in self._normalize_whitespace_stream(self._remove_think_blocks_stream(pieces)):
+                parts.append(text)
+                yield text
+        except Exception as e:
+            logger.error(f"Error generating summary: {e}")
+            if not parts:
+                yield "Error: Unable to generate summary at this time."
+            return
+        
+        if self._summary_cache is not None:
+            self._summary_cache.set(cache_key, ''.join(parts), expire=self.cache_ttl)
+    
+    @classmethod
+    def _remove_think_blocks_stream(cls, pieces: Iterator[str]) -> Iterator[str]:
+        """
+        Remove <think> blocks from streamed text, like _filter_think_blocks does for the whole text.
+        
+        Text is yielded as soon as it is known not to start a block; an unclosed block
+        is kept as it is, as a block only counts once its closing tag arrives.
+        
+        Args:
+            pieces: Successive pieces of the text
+            
+        Yields:
+            Successive pieces of the text without <think> blocks
+        """
+        pending = ''
+        think_text = None
+        for piece in pieces:
+            pending += piece
+            while pending:
+                if think_text is not None:
+                    end = pending.find(THINK_CLOSE)
+                    if end == -1:
+                        # Keep only what could be the start of the closing tag pending
+                        start = cls._partial_tag_start(pending, THINK_CLOSE)
+                        think_text, pending = think_text + pending[:start], pending[start:]
+                        break
+                    pending = pending[end + len(THINK_CLOSE):]
+                    think_text = None
+                else:
+                    start = pending.find(THINK_OPEN)
+                    if start == -1:
+                        # Hold back a trailing partial opening tag until more text arrives
+                        start = cls._partial_tag_start(pending, THINK_OPEN)
+                        text, pending = pending[:start], pending[start:]
+                    else:
+                        text, pending = pending[:start], pending[start + len(THINK_OPEN):]
+                        think_text = ''
+                    if text:
+                        yield text
+                    if think_text is None:
+                        break
+        
+        if think_text is not None:
+            # The block was never closed, so it is part of the text
+            pending = THINK_OPEN + think_text + pending
+        if pending:
+            yield pending
+    
+    @staticmethod
+    def _normalize_whitespace_stream(pieces: Iterator[str]) -> Iterator[str]:
+        """
+        Normalize whitespace in streamed text, like _normalize_whitespace does for the whole text.
+        
+        Whitespace is held back until the following text arrives, so every run of
+        whitespace is collapsed as a whole and trailing whitespace is dropped.
+        
+        Args:
+            pieces: Successive pieces of the text
+            
+        Yields:
+            Successive pieces of the normalized text
+        """
+        pending = ''
+        started = False
+        for piece in pieces:
+            text = pending + piece
+            stripped = text.rstrip()
+            pending = text[len(stripped):]
+            if not stripped:
+                continue
+            if not started:
+                stripped = stripped.lstrip()
+                started = True
+            yield BLANK_LINES_PATTERN.sub('\n\n', stripped)
+    
+    def _cache_key(self, prompt: str) -> str:
+        """
+        Get the summary cache key of a request.
+        
+        Args:
+            prompt: The user prompt
+            
+        Returns:
+            Hex digest identifying the request
+        """
+        return hashlib.blake2b(
+            f"{self.model}|{self.max_tokens}|{self.shards}|{self.system_prompt}|{prompt}".encode('utf-8'),
+            digest_size=16
+        ).hexdigest()
+    
+    def _get_cached_summary(self, cache_key: str) -> Optional[str]:
+        """
+        Get the cached summary of an identical request.
+        
+        Args:
+            cache_key: The summary cache key of the request
+            
+        Returns:
+            The cached summary, or None if there is none
+        """
+        if self._summary_cache is None:
+            return None
+        
+        cached = self._summary_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Using cached summary for identical articles")
+        return cached
+    
+    @staticmethod
+    def _partial_tag_start(text: str, tag: str) -> int:
+        """
+        Find where a prefix of a tag starts at the end of the text.
+        
+        Args:
+            text: The text to search
+            tag: The tag to look for
+            
+        Returns:
+            Index of the trailing tag prefix, or the length of the text if there is none
+        """
+        for size in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:size]):
+                return len(text) - size
+        return len(text)
+    
+    def _shard_count(self, articles: List[Article]) -> int:
+        """
+        Get the number of shards to summarize the articles in.
+        
+        Args:
+            articles: List of news articles
+            
+        Returns:
+            Number of shards, 1 if the articles are summarized with a single request
+        """
+        return max(1, min(self.shards, len(articles) // MIN_ARTICLES_PER_SHARD))
+    
+    def _summarize_shards(self, articles: List[Article], use_all_articles: bool = False) -> str:
+        """
+        Summarize shards of the articles concurrently and prepare the prompt merging their notes.
+        
+        Args:
+            articles: List of news articles
+            use_all_articles: Whether to use all articles without focusing on specific tickers/keywords
+            
+        Returns:
+            Formatted prompt string for the final summary
+        """
+        prompts = self._prepare_map_prompts(articles, use_all_articles)
+        
+        def summarize_shard(prompt: str) -> str:
+            return self._filter_think_blocks(self._call_groq(prompt).choices[0].message.content)
+        
+        with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+            partials = list(executor.map(summarize_shard, prompts))
+        
+        return self._prepare_reduce_prompt(partials, use_all_articles)
+    
+    async def _summarize_shards_async(self, articles: List[Article], use_all_articles: bool = False) -> str:
+        """
+        Summarize shards of the articles concurrently on the event loop and prepare the prompt merging their notes.
+        
+        Args:
+            articles: List of news articles
+            use_all_articles: Whether to use all articles without focusing on specific tickers/keywords
+            
+        Returns:
+            Formatted prompt string for the final summary
+        """
+        prompts = self._prepare_map_prompts(articles, use_all_articles)
+        
+        async def summarize_shard(prompt: str) -> str:
+            response = await self._call_groq_async(prompt)
+            return self._filter_think_blocks(response.choices[0].message.content)
+        
+        partials = await asyncio.gather(*(summarize_shard(prompt) for prompt in prompts))
+        
+        return self._prepare_reduce_prompt(partials, use_all_articles)
+    
+    def _prepare_map_prompts(self, articles: List[Article], use_all_articles: bool = False) -> List[str]:
+        """
+        Split the articles into shards and prepare the prompt summarizing each shard.
+        
+        Args:
+            articles: List of news articles
+            use_all_articles: Whether to use all articles without focusing on specific tickers/keywords
+            
+        Returns:
+            Formatted prompt strings, one per shard
+        """
+        shard_size = math.ceil(len(articles) / self._shard_count(articles))
+        shards = [articles[start:start + shard_size] for start in range(0, len(articles), shard_size)]
+        focus = self._focus_text(use_all_articles)
+        
+        logger.info(f"Summarizing {len(articles)} articles in {len(shards)} shards")
+        return [self.PROMPT_MAP.format_map({'articles_text': self._format_articles(shard), 'focus': focus})
+                for shard in shards]
+    
+    def _prepare_reduce_prompt(self, partials: List[str], use_all_articles: bool = False) -> str:
+        """
+        Prepare the prompt merging the notes of all shards into the final summary.
+        
+        Args:
+            partials: The notes of each shard
+            use_all_articles: Whether to use all articles without focusing on specific tickers/keywords
+            
+        Returns:
+            Formatted prompt string
+        """
+        return self.PROMPT_REDUCE.format_map({
+            'partials': '\n\n'.join(f"Notes {i}:\n{partial}" for i, partial in enumerate(partials, 1)),
+            'focus': self._focus_text(use_all_articles),
+            'summary_length': self.summary_length
+        })
+    
+    def _focus_text(self, use_all_articles: bool = False) -> str:
+        """
+        Get the prompt lines naming the tickers and keywords to focus on.
+        
+        Args:
+            use_all_articles: Whether to use all articles without focusing on specific tickers/keywords
+            
+        Returns:
+            The focus lines, or an empty string when not focusing
+        """
+        if use_all_articles:
+            return ''
+        return (f"\nFocus on these stocks/tickers of interest: {self._tickers_text}\n"
+                f"And these keywords/topics: {self._keywords_text}\n")
+    
+    def _chat_request(self, prompt: str, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Build the arguments of a chat completion request.
+        
+        Args:
+            prompt: The user prompt
+            **kwargs: Additional arguments for the completion request
+            
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
+        return dict(
+            model=self.model,  # Using model specified in config
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=self.max_tokens,
+            **kwargs
+        )
+    
+    def _retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Get the jittered exponential backoff before retrying a failed Groq request.
+        
+        Args:
+            attempt: Number of the attempt that failed, starting at 1
+            error: The error the attempt failed with
+            
+        Returns:
+            Seconds to wait before the next attempt, or None if the request should not be retried
+        """
+        import groq
+        
+        retryable_errors = (groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError)
+        if not isinstance(error, retryable_errors) or attempt >= GROQ_MAX_ATTEMPTS:
+            return None
+        
+        delay = random.uniform(GROQ_MIN_BACKOFF, min(GROQ_MAX_BACKOFF, GROQ_MIN_BACKOFF * 2 ** attempt))
+        logger.warning(f"Groq request failed ({error}), retrying in {delay:.1f} seconds ({attempt}/{GROQ_MAX_ATTEMPTS - 1})")
+        return delay
+    
+    def _call_groq(self, prompt: str, **kwargs: Any) -> Any:
+        """
+        Request a chat completion, retrying with jittered exponential backoff on rate limits and transient errors.
+        
+        Args:
+            prompt: The user prompt
+            **kwargs: Additional arguments for the completion request
+            
+        Returns:
+            The completion response, or an iterator of completion chunks when streaming
+        """
+        attempt = 1
+        while True:
+            try:
+                return self.client.chat.completions.create(**self._chat_request(prompt, **kwargs))
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+    
+    async def _call_groq_async(self, prompt: str, **kwargs: Any) -> Any:
+        """
+        Request a chat completion with the async client, retrying like _call_groq without blocking the event loop.
+        
+        Args:
+            prompt: The user prompt
+            **kwargs: Additional arguments for the completion request
+            
+        Returns:
+            The completion response
+        """
+        attempt = 1
+        while True:
+            try:
+                return await self.aclient.chat.completions.create(**self._chat_request(prompt, **kwargs))
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+    
     def _filter_think_blocks(self, text: str) -> str:
         """
-        Filter out <think> blocks from the text.
+        Filter out <think> blocks from the text and normalize its whitespace.
         
         Args:
             text: The text to filter
@@ -115,14 +641,24 @@ class Summarizer:
         Returns:
             Filtered text
         """
-        import re
         # Remove all content between <think> and </think> tags (including the tags)
-        filtered_text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
-        # Remove any empty lines that might result from the filtering
-        filtered_text = re.sub(r'\n\s*\n', '\n\n', filtered_text)
-        return filtered_text
+        filtered_text = THINK_BLOCK_PATTERN.sub('', text)
+        return self._normalize_whitespace(filtered_text)
+    
+    @staticmethod
+    def _normalize_whitespace(text: str) -> str:
+        """
+        Collapse runs of empty lines, which the filtering can leave behind, and strip the text.
+        
+        Args:
+            text: The text to normalize
+            
+        Returns:
+            Normalized text
+        """
+        return BLANK_LINES_PATTERN.sub('\n\n', text).strip()
     
-    def _prepare_prompt(self, articles: List[Dict[str, Any]], use_all_articles: bool = False) -> str:
+    def _prepare_prompt(self, articles: List[Article], use_all_articles: bool = False) -> str:
         """
         Prepare the prompt for the AI based on the articles.
         
@@ -133,48 +669,56 @@ class Summarizer:
         Returns:
             Formatted prompt string
         """
-        # Extract user preferences for context
-        tickers = self.config.get('tickers', [])
-        keywords = self.config.get('keywords', [])
+        # Construct the prompt - exclude tickers and keywords if use_all_articles is True
+        template = self.PROMPT_ALL if use_all_articles else self.PROMPT_FOCUSED
+        prompt = template.format_map({
+            'articles_text': self._format_articles(articles),
+            'tickers': self._tickers_text,
+            'keywords': self._keywords_text,
+            'summary_length': self.summary_length
+        })
         
-        # Format articles for the prompt
-        articles_text = ""
-        for i, article in enumerate(articles, 1):
-            articles_text += f"Article {i}:\n"
-            articles_text += f"Title: {article.get('title', 'No title')}\n"
-            articles_text += f"Source: {article.get('source', 'Unknown')}\n"
-            articles_text += f"Date: {article.get('published', 'Unknown date')}\n"
-            articles_text += f"Summary: {article.get('summary', 'No summary available')}\n"
-            articles_text += f"URL: {article.get('link', 'No URL')}\n\n"
+        return prompt
+    
+    def _format_articles(self, articles: List[Article]) -> str:
+        """
+        Format the articles for a prompt.
         
-        # Construct the prompt - exclude tickers and keywords if use_all_articles is True
-        if use_all_articles:
-            prompt = f"""Please provide a concise summary of the following financial news articles.
-
-Here are the articles to summarize:
-
-{articles_text}
-
-Please create a well-structured summary that:
-1. Identifies key market trends and insights
-2. Organizes information by topic or relevance
-3. Is concise and easy to read (around {self.config['ai'].get('summary_length', '300-1000')} words)
-4. Includes a brief market outlook based on the news"""
-        else:
-            prompt = f"""Please provide a concise summary of the following financial news articles.
-
-Focus on these stocks/tickers of interest: {', '.join(tickers)}
-And these keywords/topics: {', '.join(keywords)}
-
-Here are the articles to summarize:
-
-{articles_text}
-
-Please create a well-structured summary that:
-1. Highlights the most important news for the specified tickers
-2. Identifies key market trends and insights
-3. Organizes information by topic or relevance
-4. Is concise and easy to read (around {self.config['ai'].get('summary_length', '300-1000')} words)
-5. Includes a brief market outlook based on the news"""
+        Duplicate articles are skipped, and articles are added until the token budget
+        (estimated at 4 characters per token) is used up, so the least relevant
+        articles are the ones left out.
+        
+        Args:
+            articles: List of news articles
+            
+        Returns:
+            Formatted articles text
+        """
+        parts = []
+        append = parts.append
+        seen = set()
+        remaining_chars = self.max_prompt_tokens * 4
+        for article in articles:
+            key = article.link or ' '.join(article.title.lower().split())
+            if key in seen:
+                continue
+            seen.add(key)
+            
+            summary = article.summary
+            if len(summary) > MAX_ARTICLE_SUMMARY_CHARS:
+                summary = summary[:MAX_ARTICLE_SUMMARY_CHARS].rstrip() + '...'
+            
+            text = (f"Article {len(parts) + 1}:\n"
+                    f"Title: {article.title}\n"
+                    f"Source: {article.source}\n"
+                    f"Date: {article.published}\n"
+                    f"Summary: {summary}\n"
+                    f"URL: {article.link}\n\n")
+            remaining_chars -= len(text)
+            if remaining_chars < 0 and parts:
+                break
+            append(text)
         
-        return prompt
\ No newline at end of file
+        if len(parts) < len(articles):
+            logger.info(f"Including {len(parts)} of {len(articles)} articles in the summary prompt")
+        return ''.join(parts)
\ No newline at end of file